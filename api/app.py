@@ -171,6 +171,13 @@ async def startup_event():
     ensure_media_directories()  # Ensure directories exist before service init
     init_services()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections held by long-lived services."""
+    simulation_service = getattr(router, "simulation_service", None)
+    if simulation_service is not None:
+        await simulation_service.media_service.aclose()
+
 # Include API routes
 app.include_router(router)
 
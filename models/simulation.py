@@ -132,21 +132,23 @@ class SimulationState(BaseModel):
         Returns:
             A string containing the formatted simulation history.
         """
-        history_text = ""
+        # Collect the pieces and join once instead of re-copying the growing string
+        parts: List[str] = []
 
         for turn in self.turns:
-            if turn.selected_scenario:
-                history_text += f"TURN {turn.turn_number}:\n"
-                history_text += f"SITUATION: {turn.selected_scenario.situation_description}\n"
-                if turn.selected_scenario.user_role:
-                    history_text += f"USER ROLE: {turn.selected_scenario.user_role}\n"
-                if turn.selected_scenario.user_prompt:
-                    history_text += f"USER PROMPT: {turn.selected_scenario.user_prompt}\n"
+            scenario = turn.selected_scenario
+            if scenario:
+                parts.append(f"TURN {turn.turn_number}:\n")
+                parts.append(f"SITUATION: {scenario.situation_description}\n")
+                if scenario.user_role:
+                    parts.append(f"USER ROLE: {scenario.user_role}\n")
+                if scenario.user_prompt:
+                    parts.append(f"USER PROMPT: {scenario.user_prompt}\n")
 
                 if turn.user_response:
-                    history_text += f"USER RESPONSE: {turn.user_response.response_text}\n\n"
+                    parts.append(f"USER RESPONSE: {turn.user_response.response_text}\n\n")
 
-        return history_text
+        return "".join(parts)
 
     def add_scenarios(self, turn_number: int, scenarios: List[Scenario]) -> None:
         """
@@ -5,19 +5,44 @@ This module provides services for storing and retrieving media files
 using Cloudflare R2 object storage.
 """
 
-import os
 import io
 import logging
+import random
 import uuid
 import boto3
-from typing import Optional, Dict, Any, BinaryIO, Union, Tuple
+from typing import Optional, Dict, Any, BinaryIO, Union, Tuple, List
 from botocore.exceptions import ClientError, EndpointConnectionError, ConnectionClosedError
 from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
 import time
+import threading
 import traceback
+from collections import OrderedDict
 
 logger = logging.getLogger(__name__)
 
+# Large media is sent as a multipart upload in 8 MB parts, so memory stays
+# bounded by a few parts rather than the whole object.
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+STREAM_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_CHUNK_SIZE,
+    multipart_chunksize=MULTIPART_CHUNK_SIZE,
+    use_threads=True
+)
+
+# boto3 keeps 10 pooled connections by default. Each turn runs several uploads
+# in worker threads at once, and each multipart upload opens up to 10 part
+# streams, so a small pool makes the threads queue for a socket.
+MAX_POOL_CONNECTIONS = 50
+
+# Presigned URLs are reused until this fraction of their lifetime has passed,
+# leaving clients a margin before the signature expires.
+PRESIGNED_URL_REUSE_FRACTION = 0.9
+PRESIGNED_URL_CACHE_SIZE = 1024
+
+# S3 DeleteObjects accepts at most this many keys per request
+DELETE_BATCH_SIZE = 1000
+
 class CloudflareR2ServiceError(Exception):
     """Base exception for Cloudflare R2 service errors."""
     pass
@@ -75,10 +100,17 @@ class CloudflareR2Service:
             config=Config(
                 signature_version='s3v4',
                 s3={'addressing_style': 'path'},  # R2 requires path-style addressing
-                retries={'max_attempts': max_retries, 'mode': 'standard'}
+                retries={'max_attempts': max_retries, 'mode': 'standard'},
+                max_pool_connections=MAX_POOL_CONNECTIONS,
+                tcp_keepalive=True
             )
         )
         
+        # (object_key, expiry) -> (time.monotonic() when signed, url); filled from
+        # worker threads, so guarded by a lock
+        self._presigned_urls: "OrderedDict[Tuple[str, int], Tuple[float, str]]" = OrderedDict()
+        self._presigned_lock = threading.Lock()
+
         # Ensure the bucket exists
         self._ensure_bucket_exists()
     
@@ -136,10 +168,12 @@ class CloudflareR2Service:
                 # These are network errors that may be transient
                 last_error = e
                 if attempt < self.max_retries:
-                    wait_time = self.retry_delay * attempt  # Exponential backoff
+                    # Exponential backoff with jitter so parallel uploads that
+                    # failed together do not retry in lockstep
+                    wait_time = self.retry_delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.0)
                     logger.warning(
                         f"Network error during R2 operation (attempt {attempt}/{self.max_retries}), "
-                        f"retrying in {wait_time}s: {str(e)}"
+                        f"retrying in {wait_time:.2f}s: {str(e)}"
                     )
                     time.sleep(wait_time)
                 else:
@@ -229,6 +263,62 @@ class CloudflareR2Service:
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
             raise CloudflareR2ServiceError(error_msg) from e
     
+    def upload_stream(self, file_obj: BinaryIO, object_key: str, content_type: str) -> str:
+        """
+        Upload a file-like object to R2 storage without reading it into memory.
+        
+        Args:
+            file_obj: A readable binary file-like object, e.g. an open file
+            object_key: The full object key (including prefix) to store under
+            content_type: The MIME type to store with the object
+            
+        Returns:
+            Public URL or presigned URL to the uploaded object
+            
+        Raises:
+            CloudflareR2ServiceError: If there's an error uploading the stream
+        """
+        extra_args = {'ContentType': content_type}
+        if self.public_access:
+            extra_args['ACL'] = 'public-read'
+
+        def _upload():
+            # A retry after a partial read must start from the beginning again
+            if file_obj.seekable():
+                file_obj.seek(0)
+            self.client.upload_fileobj(
+                file_obj,
+                self.bucket_name,
+                object_key,
+                ExtraArgs=extra_args,
+                Config=STREAM_TRANSFER_CONFIG
+            )
+
+        try:
+            logger.info(f"Streaming upload to R2 bucket {self.bucket_name} with key {object_key}")
+            start_time = time.time()
+
+            self._with_retry(_upload)
+
+            upload_time = time.time() - start_time
+            logger.info(f"Streaming upload completed in {upload_time:.2f}s")
+
+            # Generate the appropriate URL
+            if self.public_access and self.public_url:
+                url = f"{self.public_url}/{object_key}"
+            elif self.public_access:
+                url = f"{self.endpoint}/{self.bucket_name}/{object_key}"
+            else:
+                url = self.generate_presigned_url(object_key)
+
+            logger.info(f"Stream uploaded successfully. URL: {url}")
+            return url
+
+        except Exception as e:
+            error_msg = f"Error streaming upload to R2: {str(e)}"
+            logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            raise CloudflareR2ServiceError(error_msg) from e
+
     def upload_audio(self, audio_data: Union[bytes, BinaryIO], filename: Optional[str] = None) -> str:
         """
         Upload an audio file to R2 storage.
@@ -408,6 +498,10 @@ class CloudflareR2Service:
     def generate_presigned_url(self, object_key: str, expiry: Optional[int] = None) -> str:
         """
         Generate a presigned URL for an object in R2 storage.
+
+        A URL signed earlier for the same key and expiry is returned while less
+        than PRESIGNED_URL_REUSE_FRACTION of its lifetime has passed, which also
+        skips the existence check.
         
         Args:
             object_key: The object key (including prefix) of the file
@@ -421,6 +515,13 @@ class CloudflareR2Service:
         """
         if expiry is None:
             expiry = self.url_expiry
+
+        cache_key = (object_key, expiry)
+        with self._presigned_lock:
+            cached = self._presigned_urls.get(cache_key)
+            if cached and time.monotonic() - cached[0] < expiry * PRESIGNED_URL_REUSE_FRACTION:
+                self._presigned_urls.move_to_end(cache_key)
+                return cached[1]
             
         try:
             # Check if the object exists first
@@ -447,6 +548,12 @@ class CloudflareR2Service:
             )
             
             logger.info(f"Generated presigned URL for {object_key} with {expiry}s expiry")
+
+            with self._presigned_lock:
+                self._presigned_urls[cache_key] = (time.monotonic(), url)
+                self._presigned_urls.move_to_end(cache_key)
+                while len(self._presigned_urls) > PRESIGNED_URL_CACHE_SIZE:
+                    self._presigned_urls.popitem(last=False)
             return url
             
         except FileNotFoundError:
@@ -457,6 +564,50 @@ class CloudflareR2Service:
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
             raise CloudflareR2ServiceError(error_msg) from e
     
+    def file_exists(self, object_key: str) -> bool:
+        """
+        Check whether a file exists in R2 storage.
+
+        Args:
+            object_key: The object key (including prefix) of the file
+
+        Returns:
+            True if the object exists, False if R2 reports it missing
+
+        Raises:
+            CloudflareR2ServiceError: If the existence check itself fails
+        """
+        try:
+            self.client.head_object(Bucket=self.bucket_name, Key=object_key)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            error_msg = f"Error checking file in R2: {str(e)}"
+            logger.error(error_msg)
+            raise CloudflareR2ServiceError(error_msg) from e
+
+    def head_bucket(self) -> bool:
+        """
+        Check that the bucket is reachable with the configured credentials.
+
+        A HEAD request carries no body, so this is cheaper than listing
+        objects for health checks.
+
+        Returns:
+            True if the bucket responded
+
+        Raises:
+            CloudflareR2ServiceError: If the bucket cannot be reached
+        """
+        try:
+            self.client.head_bucket(Bucket=self.bucket_name)
+            return True
+        except ClientError as e:
+            error_msg = f"Error checking bucket {self.bucket_name} in R2: {str(e)}"
+            logger.error(error_msg)
+            raise CloudflareR2ServiceError(error_msg) from e
+
     def delete_file(self, object_key: str) -> bool:
         """
         Delete a file from R2 storage.
@@ -497,6 +648,41 @@ class CloudflareR2Service:
             logger.error(f"Error deleting file from R2: {str(e)}")
             return False
     
+    def delete_files(self, object_keys: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Delete many files from R2 storage using batched DeleteObjects requests.
+        
+        Args:
+            object_keys: The object keys (including prefix) of the files to delete
+            
+        Returns:
+            Tuple containing (list of deleted keys, dict of key -> error message)
+        """
+        deleted: List[str] = []
+        errors: Dict[str, str] = {}
+
+        for start in range(0, len(object_keys), DELETE_BATCH_SIZE):
+            chunk = object_keys[start:start + DELETE_BATCH_SIZE]
+            logger.info(f"Deleting {len(chunk)} files from R2 bucket {self.bucket_name}")
+            try:
+                response = self._with_retry(
+                    self.client.delete_objects,
+                    Bucket=self.bucket_name,
+                    Delete={'Objects': [{'Key': key} for key in chunk], 'Quiet': False}
+                )
+            except Exception as e:
+                logger.error(f"Error deleting files from R2: {str(e)}")
+                for key in chunk:
+                    errors[key] = str(e)
+                continue
+
+            deleted.extend(item['Key'] for item in response.get('Deleted', []))
+            for item in response.get('Errors', []):
+                errors[item['Key']] = item.get('Message') or item.get('Code', 'Unknown error')
+
+        logger.info(f"Deleted {len(deleted)} files from R2, {len(errors)} failed")
+        return deleted, errors
+
     def list_files(self, prefix: Optional[str] = None, max_keys: int = 1000) -> Tuple[list, bool]:
         """
         List files in the bucket, optionally filtered by prefix.
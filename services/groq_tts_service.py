@@ -6,17 +6,71 @@ through Groq's TTS API.
 """
 
 import os
+import io
+import re
+import wave
 import logging
 import traceback
-from pathlib import Path
-import tempfile
-from typing import Optional, Tuple, BinaryIO
+from typing import List, Optional, Tuple
 import asyncio
 
-from groq import Groq
+from groq import Groq, AuthenticationError, PermissionDeniedError
 
 logger = logging.getLogger(__name__)
 
+# Narration longer than this is split at sentence boundaries into pieces of
+# at most this many characters, synthesized concurrently and joined, so a
+# long conclusion does not wait on one long model pass
+TTS_CHUNK_CHARS = int(os.getenv("GROQ_TTS_CHUNK_CHARS", "300"))
+
+
+def _split_for_tts(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """
+    Split text into sentence-aligned pieces of at most max_chars characters
+    (default TTS_CHUNK_CHARS).
+
+    A single sentence longer than max_chars is kept whole rather than cut
+    mid-sentence.
+    """
+    max_chars = max_chars or TTS_CHUNK_CHARS
+    chunks: List[str] = []
+    current = ""
+    for sentence in re.split(r'(?<=[.!?])\s+', text.strip()):
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _join_wav(parts: List[bytes]) -> Tuple[bytes, int]:
+    """
+    Concatenate WAV clips that share one format into a single WAV file.
+
+    Returns:
+        Tuple of (wav_bytes, sampling_rate)
+
+    Raises:
+        ValueError: If the clips differ in channels, sample width or frame rate
+    """
+    out = io.BytesIO()
+    with wave.open(out, 'wb') as writer:
+        for i, part in enumerate(parts):
+            with wave.open(io.BytesIO(part), 'rb') as reader:
+                if i == 0:
+                    writer.setparams(reader.getparams())
+                elif reader.getparams()[:3] != writer.getparams()[:3]:
+                    raise ValueError(
+                        f"WAV part {i} has format {reader.getparams()[:3]}, "
+                        f"expected {writer.getparams()[:3]}")
+                writer.writeframes(reader.readframes(reader.getnframes()))
+        sampling_rate = writer.getframerate()
+    return out.getvalue(), sampling_rate
+
+
 class GroqTTSService:
     """
     Service for generating audio narration using Groq's TTS API.
@@ -35,35 +89,38 @@ class GroqTTSService:
         self.client = Groq(api_key=groq_api_key)
         self.default_voice = "Aaliyah-PlayAI"  # Default Groq TTS voice, changed from Eleanor-PlayAI
 
+        # Provider-side limit on simultaneous TTS requests from this process
+        self._tts_sem = asyncio.Semaphore(
+            int(os.getenv("GROQ_TTS_MAX_CONCURRENT_REQUESTS", "4")))
+
     def _blocking_generate_and_read(self, text: str, voice: str) -> bytes:
         """
-        Synchronous helper function to perform the blocking API call and file I/O.
-        """
-        # Create a temporary file to hold the audio data
-        # Using a context manager for safer temp file handling
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_path = temp_file.name
+        Synchronous helper function to perform the blocking API call.
 
-        try:
-            # Generate speech and write to file
-            response = self.client.audio.speech.create(
-                model="playai-tts",
-                voice=voice,
-                response_format="wav",
-                input=text
+        The response body is read straight into memory, without a round trip
+        through a temporary file.
+        """
+        response = self.client.audio.speech.create(
+            model="playai-tts",
+            voice=voice,
+            response_format="wav",
+            input=text
+        )
+        return response.read()
+
+    async def _synthesize(self, text: str, voice: str) -> bytes:
+        """
+        Run one TTS request in a worker thread, within the concurrency limit.
+        """
+        logger.info("Running Groq TTS generation in executor thread...")
+        async with self._tts_sem:
+            audio_data = await asyncio.to_thread(
+                self._blocking_generate_and_read,
+                text,
+                voice
             )
-            response.write_to_file(temp_path)
-
-            # Read the audio data from the file
-            with open(temp_path, "rb") as audio_file:
-                audio_data = audio_file.read()
-            return audio_data
-        finally:
-            # Ensure temporary file is deleted
-            try:
-                os.unlink(temp_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temporary file {temp_path}: {e}")
+        logger.info("Groq TTS generation completed in thread.")
+        return audio_data
 
     async def generate_audio(self, text: str, voice: Optional[str] = None) -> Optional[Tuple[bytes, int]]:
         """
@@ -76,6 +133,9 @@ class GroqTTSService:
 
         Returns:
             Tuple of (audio_data, sampling_rate) if successful, None otherwise
+
+        Raises:
+            AuthenticationError, PermissionDeniedError: If Groq rejects the API key
         """
         if not self.groq_api_key:
             logger.error("No Groq API key provided")
@@ -89,14 +149,24 @@ class GroqTTSService:
             logger.debug(f"Text length: {len(text)} characters")
             logger.info(f"Groq TTS Input Text: {text}")
 
-            # Run the blocking API call and file I/O in a separate thread
-            logger.info("Running Groq TTS generation in executor thread...")
-            audio_data = await asyncio.to_thread(
-                self._blocking_generate_and_read,
-                text,
-                selected_voice
-            )
-            logger.info("Groq TTS generation completed in thread.")
+            chunks = _split_for_tts(text)
+            if len(chunks) > 1:
+                # Synthesize sentence groups concurrently and stitch the clips
+                logger.info(f"Splitting narration into {len(chunks)} parts for parallel synthesis")
+                parts = await asyncio.gather(
+                    *(self._synthesize(chunk, selected_voice) for chunk in chunks))
+                if not all(parts):
+                    logger.warning("Groq TTS returned no data for part of the narration.")
+                    return None
+                try:
+                    audio_data, sampling_rate = await asyncio.to_thread(_join_wav, parts)
+                    logger.info(f"Successfully generated audio: {len(audio_data)} bytes")
+                    return (audio_data, sampling_rate)
+                except ValueError as e:
+                    # Clips in different formats cannot be stitched; ask for the whole text at once
+                    logger.warning(f"Cannot join narration parts ({e}); synthesizing it in one request")
+
+            audio_data = await self._synthesize(text, selected_voice)
 
             if not audio_data:
                 logger.warning("Blocking Groq TTS generation returned no data.")
@@ -110,6 +180,10 @@ class GroqTTSService:
             logger.info(f"Successfully generated audio: {len(audio_data)} bytes")
             return (audio_data, sampling_rate)
 
+        except (AuthenticationError, PermissionDeniedError) as e:
+            # Credentials will not start working on a retry; let the caller stop early
+            logger.error(f"Groq TTS rejected the API key: {str(e)}")
+            raise
         except Exception as e:
             logger.error(f"Error generating audio with Groq TTS: {str(e)}")
             logger.error(traceback.format_exc())
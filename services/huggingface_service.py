@@ -5,11 +5,12 @@ This module provides services for generating videos using HuggingFace's stable d
 """
 
 import os
+import random
 import time
 import logging
 import traceback
-import datetime
-from typing import Union, Tuple, Optional
+import uuid
+from typing import Optional
 import asyncio
 
 from utils.media import save_media_file
@@ -18,6 +19,12 @@ from huggingface_hub import InferenceClient
 logger = logging.getLogger(__name__)
 
 
+def _backoff_delay(retry_count: int) -> float:
+    """Exponential backoff (2, 4, 8 seconds) scaled by random jitter so
+    simulations that failed together do not all retry at the same moment."""
+    return 2 ** retry_count * random.uniform(0.5, 1.0)
+
+
 class HuggingFaceService:
     """
     Service for generating videos using HuggingFace's APIs.
@@ -39,14 +46,17 @@ class HuggingFaceService:
         )
         self.model = "Wan-AI/Wan2.2-TI2V-5B"
 
+        # Provider-side limit on simultaneous text_to_video jobs from this process
+        self._hf_sem = asyncio.Semaphore(
+            int(os.getenv("HF_MAX_CONCURRENT_REQUESTS", "4")))
+
     async def generate_video(self,
                              prompt: str,
                              turn: int = 1,
                              max_retries: int = 1) -> Optional[str]:
         """
-        Generate a video using HuggingFace API with retry logic.
-        Creates a dedicated InferenceClient instance for thread safety and true parallel execution.
-        
+        Generate a video and store it in R2 (when configured) and locally.
+
         Args:
             prompt: Text prompt for video generation
             turn: The current turn number (default: 1)
@@ -55,6 +65,68 @@ class HuggingFaceService:
         Returns:
             A URL to the video file (either R2 or local public URL),
             or None if video generation fails.
+
+        Raises:
+            Exception: The provider's HTTP error if it rejects the credentials (401/403)
+        """
+        video_data = await self.generate_video_bytes(
+            prompt, turn=turn, max_retries=max_retries)
+        if not video_data:
+            return None
+
+        try:
+            # Generate a filename with turn number; a random suffix keeps the
+            # turn's parallel videos, often finished in the same second, apart
+            filename = f"turn_{turn}_{uuid.uuid4().hex[:12]}.mp4"
+
+            # If we have R2 service, upload there first
+            r2_url = None
+            if self.r2_service:
+                try:
+                    logger.info(f"Uploading video to R2: {filename}")
+                    r2_url = await asyncio.to_thread(
+                        self.r2_service.upload_video, video_data, filename)
+                    logger.info(f"Video uploaded to R2. URL: {r2_url}")
+                except Exception as e_r2:
+                    logger.error(f"Failed to upload video to R2: {e_r2}")
+                    logger.error(traceback.format_exc())
+                    # Continue to save locally even if R2 upload fails for now
+
+            # Save locally using our utility function
+            logger.info(f"Saving video locally: {filename}")
+            public_url = await asyncio.to_thread(save_media_file, video_data,
+                                                 "video", filename)
+            logger.info(f"Video saved locally. Public URL: {public_url}")
+
+            # Return the R2 URL if available, otherwise the public local URL
+            return r2_url if r2_url else public_url
+
+        except Exception as e:
+            logger.error(
+                f"An unexpected error occurred while storing the video: {e}")
+            logger.error(traceback.format_exc())
+            return None  # Return None for other exceptions as well to ensure graceful failure
+
+    async def generate_video_bytes(self,
+                                   prompt: str,
+                                   turn: int = 1,
+                                   max_retries: int = 1) -> Optional[bytes]:
+        """
+        Generate a video using HuggingFace API with retry logic, without storing it.
+
+        Callers that keep their own storage layout (MediaService) use this so
+        the video is uploaded exactly once, under the caller's object key.
+
+        Args:
+            prompt: Text prompt for video generation
+            turn: The current turn number, used for logging (default: 1)
+            max_retries: Maximum number of retry attempts (default: 1)
+
+        Returns:
+            The MP4 bytes, or None if video generation fails.
+
+        Raises:
+            Exception: The provider's HTTP error if it rejects the credentials (401/403)
         """
         import threading
         thread_id = threading.current_thread().name
@@ -71,32 +143,33 @@ class HuggingFaceService:
         while retry_count < max_retries and video_data is None:
             try:
                 logger.info(
-                    f"[Thread {thread_id}] Running HuggingFace client.text_to_video in executor thread... (Attempt {retry_count + 1}/{max_retries})"
-                )
+                    "[Thread %s] Running HuggingFace client.text_to_video in executor thread... (Attempt %d/%d)",
+                    thread_id, retry_count + 1, max_retries)
                 
                 # Use timeout of 3 minutes for video generation
                 timeout = 180  # 3 minutes timeout for video generation
                 
                 # Log when we're about to make the actual API call
-                import time
                 start_time = time.time()
-                logger.info(f"[Thread {thread_id}] Starting API call at {start_time:.2f}")
+                logger.info("[Thread %s] Starting API call at %.2f", thread_id, start_time)
                 
                 # Define a wrapper function to run in thread
                 def run_video_generation():
                     import threading
                     actual_thread = threading.current_thread().name
-                    logger.info(f"[ACTUAL Thread {actual_thread}] Now in thread pool, making API call")
+                    logger.info("[ACTUAL Thread %s] Now in thread pool, making API call", actual_thread)
                     return self.client.text_to_video(prompt, model=self.model)
                 
-                # Use shared client instance for better connection pooling
-                video_data = await asyncio.wait_for(
-                    asyncio.to_thread(run_video_generation),
-                    timeout=timeout
-                )
+                # Use shared client instance for better connection pooling.
+                # Time spent queueing for a slot does not count toward the timeout.
+                async with self._hf_sem:
+                    video_data = await asyncio.wait_for(
+                        asyncio.to_thread(run_video_generation),
+                        timeout=timeout
+                    )
                 
                 end_time = time.time()
-                logger.info(f"[Thread {thread_id}] API call completed in {end_time - start_time:.2f} seconds")
+                logger.info("[Thread %s] API call completed in %.2f seconds", thread_id, end_time - start_time)
                 
                 if video_data:
                     break  # Success, exit retry loop
@@ -104,20 +177,29 @@ class HuggingFaceService:
             except asyncio.TimeoutError:
                 retry_count += 1
                 if retry_count < max_retries:
-                    wait_time = 2 ** retry_count  # Exponential backoff: 2, 4, 8 seconds
-                    logger.warning(f"Video generation timed out. Retrying in {wait_time} seconds... (Attempt {retry_count + 1}/{max_retries})")
+                    wait_time = _backoff_delay(retry_count)
+                    logger.warning("Video generation timed out. Retrying in %.1f seconds... (Attempt %d/%d)", wait_time, retry_count + 1, max_retries)
                     await asyncio.sleep(wait_time)
                 else:
-                    logger.error(f"Video generation failed after {max_retries} attempts due to timeout")
+                    logger.error("Video generation failed after %d attempts due to timeout", max_retries)
                     return None
             except Exception as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status in (401, 403):
+                    # Bad credentials fail the same way on every attempt
+                    logger.error("Video generation rejected credentials (%s), not retrying: %s", status, e)
+                    raise
+                if status in (400, 404, 410, 422):
+                    # The request itself was rejected; retrying cannot help
+                    logger.error("Video generation rejected the request (%s), not retrying: %s", status, e)
+                    return None
                 retry_count += 1
                 if retry_count < max_retries:
-                    wait_time = 2 ** retry_count  # Exponential backoff: 2, 4, 8 seconds
-                    logger.warning(f"Video generation failed: {e}. Retrying in {wait_time} seconds... (Attempt {retry_count + 1}/{max_retries})")
+                    wait_time = _backoff_delay(retry_count)
+                    logger.warning("Video generation failed: %s. Retrying in %.1f seconds... (Attempt %d/%d)", e, wait_time, retry_count + 1, max_retries)
                     await asyncio.sleep(wait_time)
                 else:
-                    logger.error(f"Video generation failed after {max_retries} attempts: {e}")
+                    logger.error("Video generation failed after %d attempts: %s", max_retries, e)
                     return None
         
         if not video_data:
@@ -125,70 +207,19 @@ class HuggingFaceService:
             return None
         
         # Process the video data after successful generation
-        try:
-            logger.info(
-                f"HuggingFace client.text_to_video completed. Type of video_data: {type(video_data)}"
-            )
-
-            if isinstance(video_data, bytes):
-                logger.info(f"video_data is bytes, length: {len(video_data)}")
-            else:
-                # Log a snippet if it's not bytes, as it might be an unexpected structure
-                logger.warning(
-                    f"video_data is not bytes. Content (snippet): {str(video_data)[:200]}"
-                )
-                # If video_data is not bytes here, subsequent processing will likely fail.
-                # This could happen if the API behavior changes or if an error structure is returned
-                # that isn't an exception.
-
-            # Ensure video_data is bytes before proceeding
-            if not isinstance(video_data, bytes):
-                logger.error(
-                    f"Expected video data to be bytes, but received {type(video_data)}. Cannot process video."
-                )
-                return None
-
-            # Generate a filename with turn number
-            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = f"turn_{turn}_{timestamp}.mp4"
-
-            # If we have R2 service, upload there first
-            r2_url = None
-            if self.r2_service:
-                try:
-                    logger.info(f"Uploading video to R2: {filename}")
-                    r2_url = await asyncio.to_thread(
-                        self.r2_service.upload_video, video_data, filename)
-                    logger.info(f"Video uploaded to R2. URL: {r2_url}")
-                except Exception as e_r2:
-                    logger.error(f"Failed to upload video to R2: {e_r2}")
-                    logger.error(traceback.format_exc())
-                    # Continue to save locally even if R2 upload fails for now
-
-            # Save locally using our utility function
-            logger.info(f"Saving video locally: {filename}")
-            public_url = await asyncio.to_thread(save_media_file, video_data,
-                                                 "video", filename)
-            logger.info(f"Video saved locally. Public URL: {public_url}")
-
-            # Return the R2 URL if available, otherwise the public local URL
-            return r2_url if r2_url else public_url
-
-        except KeyError as ke:
-            logger.error(f"KeyError during video generation: {ke}")
-            logger.error(traceback.format_exc()
-                         )  # Log the full traceback for the KeyError
-            if 'video' in str(ke).lower(
-            ):  # Check if 'video' is part of the error key/message
-                logger.error(
-                    "Specific KeyError related to 'video' key. "
-                    "This indicates the Fal AI provider's response did not contain the expected 'video' field "
-                    "for URL retrieval, as processed by the huggingface_hub library."
-                )
-            return None  # Return None as per requirement for graceful handling
+        logger.info(
+            f"HuggingFace client.text_to_video completed. Type of video_data: {type(video_data)}"
+        )
 
-        except Exception as e:
+        # Ensure video_data is bytes before handing it on. A non-bytes result
+        # means the API behavior changed or an error structure came back
+        # without raising.
+        if not isinstance(video_data, bytes):
             logger.error(
-                f"An unexpected error occurred during video generation: {e}")
-            logger.error(traceback.format_exc())
-            return None  # Return None for other exceptions as well to ensure graceful failure
+                f"Expected video data to be bytes, but received {type(video_data)}. "
+                f"Content (snippet): {str(video_data)[:200]}"
+            )
+            return None
+
+        logger.info(f"video_data is bytes, length: {len(video_data)}")
+        return video_data
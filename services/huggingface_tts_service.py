@@ -6,14 +6,12 @@ the Hugging Face dia-tts API.
 """
 
 import os
-import time
-import requests
 import logging
 import traceback
 import aiohttp
 import asyncio
 import json
-from typing import Tuple, Optional, Dict, Any, Union
+from typing import Tuple, Optional, Any
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,7 @@ import os
 import time
 import asyncio
 import traceback
+from collections import OrderedDict
 from langchain.chains import LLMChain
 from langchain_groq import ChatGroq
 from langchain.prompts import PromptTemplate
@@ -44,6 +45,16 @@ from services.huggingface_service import HuggingFaceService
 
 logger = logging.getLogger(__name__)
 
+# The chain prompts never change, so parse each template once at import
+# rather than on every LLM call
+PASSTHROUGH_PROMPT = PromptTemplate.from_template("{prompt}")
+VIDEO_CHAIN_PROMPT = PromptTemplate(input_variables=["scenario"],
+                                    template=VIDEO_PROMPT_TEMPLATE)
+
+# Video prompts are deterministic enough per scenario to reuse; keep the most
+# recent ones so a retried turn does not pay for another LLM round-trip
+VIDEO_PROMPT_CACHE_MAX_ENTRIES = 128
+
 
 class LLMService:
     """
@@ -106,6 +117,14 @@ class LLMService:
         # Initialize scenarios dictionary to store all scenarios
         self.scenarios_dict = {}
 
+        # Cap simultaneous Groq chat completions so a burst of simulations
+        # queues here instead of tripping the provider's rate limits
+        self._llm_sem = asyncio.Semaphore(
+            int(os.getenv("GROQ_LLM_MAX_CONCURRENT_REQUESTS", "8")))
+
+        # Parsed video scenes keyed by scenario text, oldest first
+        self._video_prompt_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
         # Pre-initialize the scenarios dictionary with all possible scenario IDs
         self._pre_initialize_scenarios_dict()
 
@@ -285,12 +304,11 @@ class LLMService:
                 # Always use moonshotai/kimi-k2-instruct via LangChain
                 logger.info(f"Using Groq model via LangChain: {model_name}")
                 llm = self._get_llm_instance(model_name)
-                chain = LLMChain(
-                    llm=llm,
-                    prompt=PromptTemplate.from_template("{prompt}"))
+                chain = LLMChain(llm=llm, prompt=PASSTHROUGH_PROMPT)
 
-                start_time = time.time()
-                response = await chain.arun(prompt=formatted_prompt)
+                async with self._llm_sem:
+                    start_time = time.time()
+                    response = await chain.arun(prompt=formatted_prompt)
                 result = response
                 response_time = time.time() - start_time
                 model_used = model_name
@@ -418,6 +436,12 @@ class LLMService:
         # Use only the situation_description for the prompt
         scenario_text = scenario.get('situation_description', '')
 
+        cached_scenes = self._video_prompt_cache.get(scenario_text)
+        if cached_scenes is not None:
+            self._video_prompt_cache.move_to_end(scenario_text)
+            logger.info("Reusing cached video scenes for this scenario")
+            return list(cached_scenes)
+
         # Use the imported prompt template
         prompt_template = VIDEO_PROMPT_TEMPLATE
 
@@ -430,14 +454,14 @@ class LLMService:
 
         try:
             # Directly use the specified Groq model
-            start_time = time.time()
             groq_llm = self._get_llm_instance(model_used)
-            # Ensure the prompt template is correctly initialized for the chain
-            # The input_variables should match what VIDEO_PROMPT_TEMPLATE expects, which is 'scenario'
-            chain_prompt = PromptTemplate(input_variables=["scenario"], template=prompt_template)
-            chain = LLMChain(llm=groq_llm, prompt=chain_prompt)
+            # VIDEO_CHAIN_PROMPT wraps VIDEO_PROMPT_TEMPLATE, whose only input is 'scenario'
+            chain = LLMChain(llm=groq_llm, prompt=VIDEO_CHAIN_PROMPT)
 
-            raw_llm_output = await chain.arun(scenario=scenario_text)
+            async with self._llm_sem:
+                # Time the call itself, not the wait for a slot
+                start_time = time.time()
+                raw_llm_output = await chain.arun(scenario=scenario_text)
             end_time = time.time()
             response_time = end_time - start_time
             logger.info(
@@ -465,6 +489,9 @@ class LLMService:
 
                 if isinstance(scenes, list) and all(isinstance(s, str) for s in scenes) and len(scenes) == 4:
                     logger.info(f"Successfully parsed {len(scenes)} scene descriptions.")
+                    self._video_prompt_cache[scenario_text] = list(scenes)
+                    while len(self._video_prompt_cache) > VIDEO_PROMPT_CACHE_MAX_ENTRIES:
+                        self._video_prompt_cache.popitem(last=False)
                     return scenes
                 else:
                     logger.error(
@@ -819,12 +846,13 @@ class LLMService:
 
         # Step 2: Parallel Video Generation and Upload for each scene
         # HuggingFaceService's generate_video method already handles generation
-        # and potential R2 upload, returning a URL.
+        # and potential R2 upload, returning a URL. Its own semaphore
+        # (HF_MAX_CONCURRENT_REQUESTS) caps the provider calls in flight.
         video_generation_tasks = []
         for i, description in enumerate(scene_descriptions):
             # Pass turn_number to generate_video for consistent file naming and logging
-            # The HuggingFaceService.generate_video method is already async
-            task = self.huggingface_service.generate_video(prompt=description, turn=turn_number)
+            task = self.huggingface_service.generate_video(
+                prompt=description, turn=turn_number)
             video_generation_tasks.append(task)
             logger.info(f"Queued video generation for scene {i+1}: {description[:100]}...")
 
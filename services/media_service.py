@@ -7,17 +7,23 @@ through external APIs (HuggingFace for video and Groq for TTS).
 
 import os
 import time
-import requests
-import aiohttp
+import httpx
 import asyncio
-import traceback
 import ssl
-from typing import Dict, Any, Optional, Union, List
+import hashlib
+import hmac
+import io
+import tempfile
+import uuid
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from typing import IO, Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
 import logging
 from services.huggingface_service import HuggingFaceService
 from services.groq_tts_service import GroqTTSService
-from services.cloudflare_r2_service import CloudflareR2Service, CloudflareR2ServiceError
 from utils.media import ensure_media_directories, save_media_file
+from utils.rate_limit import AsyncTokenBucket
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +32,46 @@ logger = logging.getLogger(__name__)
 # so production traffic always verifies certificates.
 VERIFY_SSL = os.getenv("VERIFY_SSL", "true").lower() == "true"
 
+# Connection pool settings for the shared HTTP/2 client used for provider
+# fetches. Concurrent video downloads from the same host are multiplexed over
+# one keep-alive connection instead of opening a new TCP+TLS session each.
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+HTTP_TIMEOUT = httpx.Timeout(30.0)
+
+# Downloaded videos are spooled through a temporary file on their way to R2.
+# Up to this many bytes stay in memory; anything larger spills to disk.
+VIDEO_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+# Narration audio is content-addressed by script and voice. Cached objects live
+# under audio/tts-cache/ in R2 so they can be swept by LastModified without
+# touching per-turn media; the hottest URLs are also kept in process.
+TTS_CACHE_PREFIX = "tts-cache"
+
+# Generated videos are content-addressed the same way, by model, prompt and
+# image, under videos/video-cache/ in R2.
+VIDEO_CACHE_PREFIX = "video-cache"
+
+# Size of each in-process media URL cache
+MEDIA_CACHE_MAX_ENTRIES = 256
+
+# Health checks poll get_r2_status often; reuse the last answer for this long
+R2_STATUS_TTL_SECONDS = 30.0
+
+
+def _is_auth_error(exc: BaseException) -> bool:
+    """Return True if a provider rejected our credentials (HTTP 401/403)."""
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return status in (401, 403)
+
+
+@functools.lru_cache(maxsize=1024)
+def _content_key(*parts: str) -> str:
+    """Return the hex SHA-256 of the newline-joined parts, memoized so retries
+    and prewarmed turns do not re-hash the same script."""
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
 
 class MediaService:
     """
@@ -35,6 +81,14 @@ class MediaService:
     audio narration (Groq TTS).
     """
 
+    # Set once the local media directories exist, shared by all instances
+    _dirs_created = False
+
+    # Narration templates, one per scenario shape (see _build_script)
+    CONCLUSION_SCRIPT = "{situation} {rationale} {grade_explanation} Your final grade is: {grade}."
+    OPENING_SCRIPT = "{situation} {user_role} {user_prompt}"
+    TURN_SCRIPT = "{situation} {user_prompt}"
+
     def __init__(
         self,
         huggingface_api_key: str,
@@ -46,7 +100,8 @@ class MediaService:
         cloudflare_r2_public_access: bool = True,
         cloudflare_r2_public_url: str = None,
         cloudflare_r2_url_expiry:
-        int = 3600  # Default 1 hour expiry for presigned URLs
+        int = 3600,  # Default 1 hour expiry for presigned URLs
+        max_concurrent_generations: Optional[int] = None
     ):
         """
         Initialize the media service.
@@ -61,10 +116,32 @@ class MediaService:
             cloudflare_r2_public_access: Whether R2 files should be publicly accessible (default: True)
             cloudflare_r2_public_url: Optional public URL for the R2 bucket
             cloudflare_r2_url_expiry: Expiry time in seconds for presigned URLs if not using public access
+            max_concurrent_generations: Turns allowed to generate media at once
+                (default: MAX_CONCURRENT_GENERATIONS env var, or 4)
         """
         self.huggingface_api_key = huggingface_api_key
         self.groq_api_key = groq_api_key
 
+        # Backpressure across simultaneous turns so a burst of users queues
+        # here instead of tripping provider rate limits
+        if max_concurrent_generations is None:
+            max_concurrent_generations = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "4"))
+        self._gen_sem = asyncio.Semaphore(max_concurrent_generations)
+
+        # Video requests are paced by a token bucket shared across all turns,
+        # so bursts go out immediately and only the excess waits
+        video_rpm = float(os.getenv("HF_VIDEO_REQUESTS_PER_MINUTE", "30"))
+        self._hf_limiter = AsyncTokenBucket(rate=video_rpm / 60.0, capacity=video_rpm)
+
+        # Blocking boto3 calls run on their own pool so a burst of uploads
+        # cannot starve the default executor used by every other to_thread call
+        self._r2_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("R2_MAX_WORKERS", "8")),
+            thread_name_prefix="r2")
+
+        # Shared HTTP/2 client, created lazily on first fetch (see _get_http_client)
+        self._http: Optional[httpx.AsyncClient] = None
+
         # Store R2 configuration for later reference
         self.r2_config = {
             'endpoint': cloudflare_r2_endpoint,
@@ -83,6 +160,9 @@ class MediaService:
                 cloudflare_r2_secret_access_key, cloudflare_r2_bucket_name
         ]):
             try:
+                # Imported here so deployments without R2 never load boto3
+                from services.cloudflare_r2_service import CloudflareR2Service
+
                 logger.info(
                     "Initializing Cloudflare R2 service for media storage")
                 self.r2_service = CloudflareR2Service(
@@ -94,12 +174,11 @@ class MediaService:
                     public_url=cloudflare_r2_public_url,
                     url_expiry=cloudflare_r2_url_expiry)
                 logger.info(
-                    f"Cloudflare R2 service initialized successfully (Public access: {cloudflare_r2_public_access})"
+                    "Cloudflare R2 service initialized successfully (Public access: %s)", cloudflare_r2_public_access
                 )
             except Exception as e:
-                logger.error(
-                    f"Failed to initialize Cloudflare R2 service: {e}")
-                logger.error(traceback.format_exc())
+                logger.exception(
+                    "Failed to initialize Cloudflare R2 service: %s", e)
                 self.r2_service = None
         else:
             logger.warning(
@@ -111,11 +190,219 @@ class MediaService:
             huggingface_api_key, r2_service=self.r2_service)
         self.groq_tts_service = GroqTTSService(groq_api_key)
 
+        # Local fallback directories only need creating once per process
+        if not MediaService._dirs_created:
+            ensure_media_directories()
+            MediaService._dirs_created = True
+
+        # Last get_r2_status result as (time.monotonic() when fetched, result)
+        self._r2_status_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+
+        # TTS and video requests currently running, and how many callers await each
+        self._audio_inflight: Dict[str, "asyncio.Future"] = {}
+        self._audio_waiters: Dict[str, int] = {}
+        self._video_inflight: Dict[str, "asyncio.Future"] = {}
+        self._video_waiters: Dict[str, int] = {}
+
+        # Narration started early by prewarm_audio, awaiting its generate_audio call
+        self._prewarmed_audio: "OrderedDict[str, asyncio.Future]" = OrderedDict()
+
+        # Most recently used media URLs keyed by _audio_cache_key / _video_cache_key
+        self._audio_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._video_cache: "OrderedDict[str, str]" = OrderedDict()
+
+    def _audio_cache_key(self, script: str) -> str:
+        """
+        Build the content address for a narration script.
+
+        Args:
+            script: The exact text sent to TTS
+
+        Returns:
+            Hex SHA-256 of the voice and script
+        """
+        return _content_key(self.groq_tts_service.default_voice, script)
+
+    def _video_cache_key(self, prompt: str, image_url: Optional[str]) -> str:
+        """
+        Build the content address for a video generation request.
+
+        Args:
+            prompt: The video generation prompt
+            image_url: Optional image the video is conditioned on
+
+        Returns:
+            Hex SHA-256 of the model, prompt and image URL
+        """
+        return _content_key(self.huggingface_service.model, prompt, image_url or '')
+
+    def _remember_url(self, cache: "OrderedDict[str, str]", cache_key: str,
+                      url: str) -> None:
+        """
+        Store a media URL in an in-process cache, evicting the oldest entry.
+
+        Presigned URLs expire, so only public R2 URLs are remembered.
+        """
+        if not self.r2_config.get('public_access'):
+            return
+        cache[cache_key] = url
+        cache.move_to_end(cache_key)
+        while len(cache) > MEDIA_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+    async def _lookup_cached_url(self, cache: "OrderedDict[str, str]",
+                                 cache_key: str,
+                                 object_key: str) -> Optional[str]:
+        """
+        Find previously stored media, first in process and then in R2.
+
+        Args:
+            cache: The in-process cache to check
+            cache_key: The content address of the media
+            object_key: Full R2 object key the media is stored under
+
+        Returns:
+            The media URL on a hit, None on a miss or lookup failure
+        """
+        cached_url = cache.get(cache_key)
+        if cached_url:
+            cache.move_to_end(cache_key)
+            return cached_url
+
+        if not self.r2_service:
+            return None
+        try:
+            if await self._run_r2(self.r2_service.file_exists, object_key):
+                cached_url = await self._run_r2(
+                    self.r2_service.get_file_url, object_key)
+                self._remember_url(cache, cache_key, cached_url)
+                return cached_url
+        except Exception as cache_err:
+            logger.warning("Media cache lookup for %s failed: %s", object_key, cache_err)
+        return None
+
+    async def invalidate_video_cache(self, cache_key: str) -> bool:
+        """
+        Drop a cached video so its prompt is generated afresh next time.
+
+        Meant for operators clearing a bad or stale video; removes both the
+        remembered URL and the R2 object.
+
+        Args:
+            cache_key: The content address from _video_cache_key
+
+        Returns:
+            True if the cached object was deleted from R2, False otherwise
+        """
+        self._video_cache.pop(cache_key, None)
+        if not self.r2_service:
+            return False
+        object_key = f"videos/{VIDEO_CACHE_PREFIX}/{cache_key}.mp4"
+        deleted, errors = await self._run_r2(
+            self.r2_service.delete_files, [object_key])
+        if errors:
+            logger.error("Failed to delete cached video %s: %s", object_key, errors.get(object_key))
+        return object_key in deleted
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Get the shared HTTP/2 client, creating it on first use.
+
+        The client is created lazily so it binds to the running event loop,
+        and is recreated if a previous instance was closed.
+
+        Returns:
+            The shared httpx.AsyncClient
+        """
+        if self._http is None or self._http.is_closed:
+            if VERIFY_SSL:
+                verify = True
+            else:
+                verify = ssl.create_default_context()
+                verify.check_hostname = False
+                verify.verify_mode = ssl.CERT_NONE
+            self._http = httpx.AsyncClient(http2=True,
+                                           limits=HTTP_LIMITS,
+                                           timeout=HTTP_TIMEOUT,
+                                           verify=verify,
+                                           follow_redirects=True)
+        return self._http
+
+    async def _download_video(self, url: str) -> Optional[IO[bytes]]:
+        """
+        Download a video into a spooled temporary file.
+
+        The response body is streamed in chunks. Up to VIDEO_SPOOL_MAX_BYTES
+        bytes stay in memory and larger videos spill to disk, so a big
+        download never has to be held in RAM in one piece.
+
+        Args:
+            url: URL of the video to fetch
+
+        Returns:
+            The spooled file positioned at the start, or None if the fetch failed.
+            The caller is responsible for closing it.
+        """
+        logger.info("Fetching video content from URL: %s", url)
+        spool = tempfile.SpooledTemporaryFile(max_size=VIDEO_SPOOL_MAX_BYTES)
+        try:
+            async with self._get_http_client().stream("GET", url) as response:
+                if response.status_code != 200:
+                    logger.error(
+                        "Failed to fetch video from %s, status: %s", url, response.status_code
+                    )
+                    spool.close()
+                    return None
+                async for chunk in response.aiter_bytes():
+                    spool.write(chunk)
+        except Exception as fetch_err:
+            logger.error("Error fetching video from URL %s: %s", url, fetch_err)
+            spool.close()
+            return None
+
+        size = spool.tell()
+        if size == 0:
+            logger.error("Fetched empty video from %s", url)
+            spool.close()
+            return None
+        logger.info("Fetched %s bytes of video data.", size)
+        spool.seek(0)
+        return spool
+
+    async def _run_r2(self, func, *args, **kwargs):
+        """
+        Run a blocking R2 call on the dedicated R2 thread pool.
+
+        Args:
+            func: The CloudflareR2Service method (or other blocking callable)
+            *args, **kwargs: Arguments passed through to func
+
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._r2_executor, functools.partial(func, *args, **kwargs))
+
+    async def aclose(self) -> None:
+        """
+        Close the shared HTTP client and the R2 thread pool. Call once on
+        application shutdown.
+        """
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        for task in self._prewarmed_audio.values():
+            task.cancel()
+        self._prewarmed_audio.clear()
+        self._r2_executor.shutdown(wait=False)
+
     async def generate_video(self,
                              prompt: str,
                              image_url: Optional[str] = None,
                              turn: int = 1,
-                             max_retries: int = 3) -> Optional[str]:
+                             max_retries: int = 3,
+                             filename: Optional[str] = None) -> Optional[str]:
         """
         Generate a video using HuggingFace Inference API.
 
@@ -124,368 +411,600 @@ class MediaService:
             image_url: Optional URL to an image (not used for HuggingFace)
             turn: The current turn number (default: 1)
             max_retries: Maximum number of retry attempts (default: 3)
+            filename: Optional local filename, used when R2 is not configured or
+                the upload fails; a random turn-scoped name is used if omitted.
+                When R2 is configured the video is stored under its content hash instead.
 
         Returns:
             URL of the generated video if successful, None otherwise
         """
-        logger.info(f"[generate_video] Called for turn: {turn} with prompt: {prompt[:100]}...") # Log entry with turn
-
-        # Ensure media directories exist
-        ensure_media_directories()
+        logger.info("[generate_video] Called for turn: %s with prompt: %s...", turn, prompt[:100]) # Log entry with turn
 
         try:
-            # Generate video with HuggingFace
-            # This might return a file path or binary content
-            video_result = await self.huggingface_service.generate_video(
-                prompt, turn=turn, max_retries=max_retries)
-
-            video_content: Optional[bytes] = None
-            filename: str = f"turn_{turn}_{int(time.time())}.mp4"
-            logger.info(f"[generate_video] Initial filename for turn {turn}: {filename}") # Log initial filename
-
-            # If HuggingFaceService returned a URL, try to fetch it
-            if isinstance(video_result,
-                          str) and video_result.startswith("http"):
-                try:
-                    logger.info(
-                        f"Fetching video content from URL: {video_result}")
-                    if VERIFY_SSL:
-                        connector = aiohttp.TCPConnector()
-                    else:
-                        ssl_context = ssl.create_default_context()
-                        ssl_context.check_hostname = False
-                        ssl_context.verify_mode = ssl.CERT_NONE
-                        connector = aiohttp.TCPConnector(ssl=ssl_context)
-                    async with aiohttp.ClientSession(connector=connector) as session:
-                        async with session.get(video_result) as response:
-                            if response.status == 200:
-                                video_content = await response.read()
-                                logger.info(
-                                    f"Fetched {len(video_content)} bytes of video data."
-                                )
-                            else:
-                                logger.error(
-                                    f"Failed to fetch video from {video_result}, status: {response.status}"
-                                )
-                except Exception as fetch_err:
-                    logger.error(
-                        f"Error fetching video from URL {video_result}: {fetch_err}"
-                    )
+            # The same request always yields a reusable video; skip generation
+            cache_key = self._video_cache_key(prompt, image_url)
+            cache_object = f"{VIDEO_CACHE_PREFIX}/{cache_key}.mp4"
+            cached_url = await self._lookup_cached_url(
+                self._video_cache, cache_key, f"videos/{cache_object}")
+            if cached_url:
+                logger.info("[generate_video] Video cache hit for turn %s: %s", turn, cached_url)
+                return cached_url
+
+            # Concurrent requests for the same video share one generation
+            if cache_key in self._video_inflight:
+                logger.info("[generate_video] Joining in-flight video request for turn %s", turn)
+            return await self._single_flight(
+                self._video_inflight, self._video_waiters, cache_key,
+                lambda: self._produce_video(prompt, cache_key, cache_object,
+                                            turn, max_retries, filename))
 
-            # If it returned a local path, read it
-            elif isinstance(video_result,
-                            str) and video_result.startswith("/media"):
-                # Convert relative path to absolute
-                std_path = os.path.join(os.getcwd(), video_result.lstrip('/'))
-                if os.path.exists(std_path) and os.path.getsize(std_path) > 0:
-                    logger.info(
-                        f"Reading video content from local path: {std_path}")
-                    with open(std_path, 'rb') as f:
-                        video_content = f.read()
-                    filename = os.path.basename(
-                        std_path)  # Keep original filename if from path
-                else:
-                    logger.error(
-                        f"Video file not found or empty at path: {std_path}")
-
-            # If we got binary content directly
-            elif isinstance(video_result, bytes) and len(video_result) > 0:
-                video_content = video_result
-
-            # If we got a tuple of (binary, filename)
-            elif isinstance(video_result, tuple) and len(video_result) == 2:
-                video_content, fn_from_tuple = video_result
-                if isinstance(fn_from_tuple,
-                              str) and fn_from_tuple.endswith('.mp4'):
-                    filename = fn_from_tuple  # Use filename from tuple
-
-            # Now, upload if we have content and R2 is configured
-            if video_content and self.r2_service:
-                try:
-                    logger.info(
-                        f"[generate_video] Attempting to upload video '{filename}' (for turn {turn}) to Cloudflare R2..."
-                    ) # Log R2 attempt
-                    r2_url = await asyncio.to_thread(
-                        self.r2_service.upload_video,
-                        video_content,
-                        filename=filename)
-                    logger.info(f"[generate_video] URL returned by R2 upload for turn {turn}, filename '{filename}': {r2_url}") # Log R2 URL
-                    logger.info(f"Video successfully uploaded to R2: {r2_url}")
-                    logger.info(f"[generate_video] Final URL being returned for turn {turn}: {r2_url}") # Log final URL
-                    return r2_url
-                except Exception as r2_err:
-                    logger.error(
-                        f"Failed to upload video to R2: {r2_err}. Falling back to local save."
-                    )
-                    # Fall through to local save below
+        except Exception as e:
+            if _is_auth_error(e):
+                raise
+            logger.exception("[generate_video] Error generating video for turn %s: %s", turn, e)
+            return None
 
-            # Fallback: Save locally if R2 is not configured, upload failed, or no content found
-            if video_content:
-                logger.info(f"[generate_video] Saving video locally as fallback for turn {turn}, filename '{filename}'.") # Log local save attempt
-                # Ensure filename is set if not derived earlier
-                if not filename: # This case might be redundant if filename is always set initially
-                    filename = f"turn_{turn}_{int(time.time())}.mp4"
-                    logger.info(f"[generate_video] Fallback filename generated for turn {turn}: {filename}")
-                paths = save_media_file(video_content, "video", filename)
-                public_url = paths.get('public_url') if paths else None
-                logger.info(f"[generate_video] URL returned by local save for turn {turn}, filename '{filename}': {public_url}") # Log local save URL
-                logger.info(f"Saved video content to local file: {public_url}")
-                logger.info(f"[generate_video] Final URL being returned for turn {turn}: {public_url}") # Log final URL
-                return public_url
-            else:
-                logger.error(
-                    "No valid video content could be obtained or processed.")
-                logger.info(f"[generate_video] Returning None for turn {turn} as no video content.") # Log return None
-                return None
+    async def _produce_video(self, prompt: str, cache_key: str,
+                             cache_object: str, turn: int, max_retries: int,
+                             filename: Optional[str]) -> Optional[str]:
+        """
+        Generate a video and store it once: in R2 under the cache object, or
+        locally if R2 is not configured or the upload fails.
 
-        except Exception as e:
-            logger.error(f"[generate_video] Error generating video for turn {turn}: {str(e)}") # Log error with turn
-            logger.error(traceback.format_exc())
-            logger.info(f"[generate_video] Returning None for turn {turn} due to exception.") # Log return None due to exception
+        HuggingFaceService.generate_video_bytes returns the MP4 bytes. A str
+        result is treated as a hosted video URL, the shape returned by
+        providers that keep the file on their side; it is streamed straight
+        into the cache object with the shared HTTP client.
+
+        Args:
+            prompt: The video generation prompt
+            cache_key: The request's content address from _video_cache_key
+            cache_object: R2 object name derived from cache_key
+            turn: The current turn number
+            max_retries: Maximum number of retry attempts
+            filename: Optional local filename, see generate_video
+
+        Returns:
+            URL of the stored video, or None if generation failed
+        """
+        await self._hf_limiter.acquire()
+        video_result = await self.huggingface_service.generate_video_bytes(
+            prompt, turn=turn, max_retries=max_retries)
+
+        video_content: Optional[bytes] = None
+        upload_to_r2 = self.r2_service is not None
+
+        if isinstance(video_result, bytes):
+            video_content = video_result
+
+        # A hosted URL: stream the download into R2 without re-reading it
+        elif isinstance(video_result, str) and video_result.startswith("http"):
+            spool = await self._download_video(video_result)
+            if spool is not None:
+                with spool:
+                    # boto3 splits large files into multipart chunks itself
+                    if upload_to_r2:
+                        try:
+                            r2_url = await self._run_r2(
+                                self.r2_service.upload_stream, spool,
+                                f"videos/{cache_object}", "video/mp4")
+                            self._remember_url(self._video_cache, cache_key, r2_url)
+                            logger.info("[generate_video] Streamed video for turn %s to R2: %s", turn, r2_url)
+                            return r2_url
+                        except Exception as r2_err:
+                            logger.error(
+                                "Failed to stream video to R2: %s. Falling back to local save.", r2_err
+                            )
+                            upload_to_r2 = False
+                    spool.seek(0)
+                    video_content = await asyncio.to_thread(spool.read)
+
+        if not video_content:
+            logger.error(
+                "No valid video content could be obtained or processed.")
             return None
 
+        if upload_to_r2:
+            try:
+                r2_url = await self._run_r2(
+                    self.r2_service.upload_video,
+                    video_content,
+                    filename=cache_object)
+                self._remember_url(self._video_cache, cache_key, r2_url)
+                logger.info("[generate_video] Uploaded video for turn %s to R2: %s", turn, r2_url)
+                return r2_url
+            except Exception as r2_err:
+                logger.error(
+                    "Failed to upload video to R2: %s. Falling back to local save.", r2_err
+                )
+
+        # Local fallback when R2 is not configured or the upload failed
+        filename = filename or f"turn_{turn}_{uuid.uuid4().hex[:12]}.mp4"
+        public_url = await asyncio.to_thread(
+            save_media_file, video_content, "video", filename)
+        logger.info("[generate_video] Saved video for turn %s locally: %s", turn, public_url)
+        return public_url
+
     async def generate_audio(self,
                              scenario: Dict[str, str],
-                             turn: int = 1) -> Optional[str]:
+                             turn: int = 1,
+                             filename: Optional[str] = None) -> Optional[str]:
         """
         Generate audio narration using Groq TTS API directly from scenario fields.
 
         Args:
             scenario: The scenario dictionary with 'situation_description', 'user_role', and 'user_prompt'
             turn: The current turn number (default: 1)
+            filename: Optional local filename, used when R2 is not configured or
+                the upload fails; a name derived from the script hash is used if omitted.
+                When R2 is configured the audio is stored under its content hash instead.
 
         Returns:
             URL of the generated audio if successful, None otherwise
         """
-        logger.info(f"[generate_audio] Called for turn: {turn}") # Log entry
-        situation = scenario.get('situation_description', '')
-        user_role = scenario.get('user_role', '')
-        user_prompt = scenario.get('user_prompt', '')
-
-        # Create a concise script that combines these elements
-        # Include user_role only if it's available and this is the first turn
-        if "grade" in scenario and "grade_explanation" in scenario: # Check for conclusion scenario
-            rationale = scenario.get('rationale', '')
-            grade_explanation = scenario.get('grade_explanation', '')
-            grade_value = scenario.get('grade', 'Not graded') # Default if grade is missing
-            script = f"{situation} {rationale} {grade_explanation} Your final grade is: {str(grade_value)}."
-            logger.info(f"Conclusion audio script generated: {script[:100]}...")
-        elif turn == 1 and user_role:
-            script = f"{situation} {user_role} {user_prompt}"
-            logger.info(f"Turn 1 audio script: {script[:100]}...")
-        else: # Other regular turns
-            script = f"{situation} {user_prompt}"
-            logger.info(f"Regular turn ({turn}) audio script: {script[:100]}...")
-
-        logger.info(f"Generating audio for scenario with Groq TTS")
-        logger.info(f"Script: {script[:100]}...")
+        logger.info("[generate_audio] Called for turn: %s", turn) # Log entry
+        script = self._build_script(scenario, turn)
+        logger.info("Turn %s audio script: %s...", turn, script[:100])
 
+        logger.info("Generating audio for scenario with Groq TTS")
+
+        cache_key = self._audio_cache_key(script)
+        prewarmed = self._prewarmed_audio.pop(cache_key, None)
+        if prewarmed is not None:
+            logger.info("[generate_audio] Using prewarmed narration for turn %s", turn)
+            return await prewarmed
+        return await self._generate_audio(script, cache_key, turn, filename)
+
+    @staticmethod
+    def new_filename_base(turn: int) -> str:
+        """
+        Return a fresh name prefix for one turn's media files.
+
+        One random id per turn: the turn's video and audio share a prefix,
+        and two turns started in the same second cannot overwrite each other.
+
+        Args:
+            turn: The current turn number
+
+        Returns:
+            A prefix such as "turn_2_1a2b3c4d5e6f"
+        """
+        return f"turn_{turn}_{uuid.uuid4().hex[:12]}"
+
+    def prewarm_audio(self, scenario: Dict[str, str], turn: int = 1,
+                      filename_base: Optional[str] = None) -> None:
+        """
+        Start synthesizing a scenario's narration before generate_audio is called.
+
+        Call this as soon as the scenario text is final so TTS overlaps with
+        later work such as writing the video prompt. The matching
+        generate_audio call then reuses the result instead of starting over.
+        Must be called with a running event loop.
+
+        Prewarming is exempt from the MAX_CONCURRENT_GENERATIONS semaphore:
+        a turn holding a slot waits on its prewarm task, so taking a slot
+        here could deadlock. GroqTTSService's own semaphore still bounds it.
+
+        Args:
+            scenario: The scenario dictionary, as later passed to generate_audio
+            turn: The turn number, as later passed to generate_audio
+            filename_base: The turn's name prefix from new_filename_base, as
+                later passed to generate_media_parallel; names the local
+                fallback file
+        """
+        script = self._build_script(scenario, turn)
+        cache_key = self._audio_cache_key(script)
+        if cache_key in self._prewarmed_audio or cache_key in self._audio_cache:
+            return
+
+        task = asyncio.ensure_future(
+            self._generate_audio(
+                script, cache_key, turn,
+                f"{filename_base}.mp3" if filename_base else None))
+        # An unclaimed prewarm must not be reported as a never-retrieved error
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._prewarmed_audio[cache_key] = task
+        while len(self._prewarmed_audio) > MEDIA_CACHE_MAX_ENTRIES:
+            _, stale = self._prewarmed_audio.popitem(last=False)
+            stale.cancel()
+
+    async def _generate_audio(self, script: str, cache_key: str, turn: int,
+                              filename: Optional[str]) -> Optional[str]:
+        """
+        Produce the narration for a script, using the caches where possible.
+
+        Args:
+            script: The text to narrate
+            cache_key: The script's content address from _audio_cache_key
+            turn: The current turn number
+            filename: Optional local filename, see generate_audio
+
+        Returns:
+            URL of the generated audio if successful, None otherwise
+        """
         try:
-            # Ensure media directories exist
-            ensure_media_directories()
+            # Identical scripts are synthesized once; reuse an earlier result
+            cached_url = await self._lookup_cached_url(
+                self._audio_cache, cache_key,
+                f"audio/{TTS_CACHE_PREFIX}/{cache_key}.mp3")
+            if cached_url:
+                logger.info("[generate_audio] TTS cache hit for turn %s: %s", turn, cached_url)
+                return cached_url
+
+            # Concurrent requests for the same script share one TTS call
+            if cache_key in self._audio_inflight:
+                logger.info("[generate_audio] Joining in-flight TTS request for turn %s", turn)
+            return await self._single_flight(
+                self._audio_inflight, self._audio_waiters, cache_key,
+                lambda: self._synthesize_audio(script, cache_key, turn, filename))
 
-            # Submit the text to Groq TTS service
-            audio_result = await self.groq_tts_service.generate_audio(script)
-
-            if not audio_result:
-                logger.warning(
-                    "Failed to generate audio with Groq TTS, returning None")
-                return None
-
-            # Unpack the audio data and sampling rate
-            audio_data, sampling_rate = audio_result
-
-            # Generate filename
-            filename = f"turn_{turn}_{int(time.time())}.mp3"
-            logger.info(f"[generate_audio] Generated filename for turn {turn}: {filename}") # Log filename
-
-            # Try uploading to R2 if configured
-            if self.r2_service:
-                try:
-                    logger.info(
-                        f"[generate_audio] Attempting to upload audio '{filename}' (for turn {turn}) to Cloudflare R2..."
-                    ) # Log R2 attempt
-                    public_url = await asyncio.to_thread(
-                        self.r2_service.upload_audio, audio_data, filename)
-                    logger.info(f"[generate_audio] URL returned by R2 upload for turn {turn}, filename '{filename}': {public_url}") # Log R2 URL
-
-                    # Check if a valid URL was returned
-                    if public_url and isinstance(
-                            public_url, str) and public_url.startswith("http"):
-                        logger.info(f"Audio uploaded to R2: {public_url}")
-                        logger.info(f"[generate_audio] Final URL being returned for turn {turn}: {public_url}") # Log final URL
-                        return public_url
-                    else:
-                        # Log if the upload method didn't return a valid URL string
-                        logger.error(
-                            f"R2 upload_audio did not return a valid URL. Result: {public_url}"
-                        )
-                        # Fall through to local save below
-                        raise CloudflareR2ServiceError(
-                            "R2 upload failed to return a valid URL.")
-
-                except Exception as r2_err:
-                    # Log the specific error from R2 upload attempt before falling back
+        except Exception as e:
+            if _is_auth_error(e):
+                raise
+            logger.exception("[generate_audio] Error generating audio for turn %s: %s", turn, e)
+            return None
+
+    async def _synthesize_audio(self, script: str, cache_key: str, turn: int,
+                                filename: Optional[str]) -> Optional[str]:
+        """
+        Synthesize a narration script and store it in R2 or locally.
+
+        Args:
+            script: The text to narrate
+            cache_key: The script's content address from _audio_cache_key
+            turn: The current turn number, used for logging and the local filename
+            filename: Optional local filename; derived from cache_key if omitted
+
+        Returns:
+            URL of the stored audio, or None if synthesis failed
+        """
+        cache_object = f"{TTS_CACHE_PREFIX}/{cache_key}.mp3"
+
+        # Submit the text to Groq TTS service
+        audio_result = await self.groq_tts_service.generate_audio(script)
+
+        if not audio_result:
+            logger.warning(
+                "Failed to generate audio with Groq TTS, returning None")
+            return None
+
+        # Unpack the audio data and sampling rate
+        audio_data, sampling_rate = audio_result
+
+        # Name the file after its content so a re-saved narration overwrites
+        # its earlier copy instead of piling up beside it
+        filename = filename or f"turn_{turn}_{cache_key[:16]}.mp3"
+        logger.info("[generate_audio] Generated filename for turn %s: %s", turn, filename) # Log filename
+
+        # Try uploading to R2 if configured
+        if self.r2_service:
+            try:
+                logger.info(
+                    "[generate_audio] Attempting to upload audio '%s' (for turn %s) to Cloudflare R2...", filename, turn
+                ) # Log R2 attempt
+                public_url = await self._run_r2(
+                    self.r2_service.upload_audio, audio_data, cache_object)
+
+                # Check if a valid URL was returned
+                if public_url and isinstance(
+                        public_url, str) and public_url.startswith("http"):
+                    self._remember_url(self._audio_cache, cache_key, public_url)
+                    logger.info("[generate_audio] Uploaded audio for turn %s to R2: %s", turn, public_url)
+                    return public_url
+                else:
+                    # Log if the upload method didn't return a valid URL string
                     logger.error(
-                        f"Failed to upload audio to R2: {r2_err}. Falling back to local save."
+                        "R2 upload_audio did not return a valid URL. Result: %s", public_url
                     )
                     # Fall through to local save below
+                    from services.cloudflare_r2_service import CloudflareR2ServiceError
+                    raise CloudflareR2ServiceError(
+                        "R2 upload failed to return a valid URL.")
 
-            # Fallback: Save the audio locally
-            logger.info(f"[generate_audio] Saving audio locally as fallback for turn {turn}, filename '{filename}'.") # Log local save attempt
-            # Assuming save_media_file returns the public URL string directly
-            public_url = save_media_file(audio_data, "audio", filename)
-            logger.info(f"[generate_audio] URL returned by local save for turn {turn}, filename '{filename}': {public_url}") # Log local save URL
+            except Exception as r2_err:
+                # Log the specific error from R2 upload attempt before falling back
+                logger.error(
+                    "Failed to upload audio to R2: %s. Falling back to local save.", r2_err
+                )
+                # Fall through to local save below
 
-            # Log whether the local save returned a valid path
-            if public_url:
-                logger.info(
-                    f"[generate_audio] Audio generation complete (local save): {public_url}")
-                logger.info(f"[generate_audio] Final URL being returned for turn {turn}: {public_url}") # Log final URL
-            else:
-                logger.error("[generate_audio] Local save of audio failed to return a path.")
+        # Fallback: Save the audio locally
+        logger.info("[generate_audio] Saving audio locally as fallback for turn %s, filename '%s'.", turn, filename) # Log local save attempt
+        # Assuming save_media_file returns the public URL string directly
+        public_url = await asyncio.to_thread(
+            save_media_file, audio_data, "audio", filename)
 
-            return public_url  # Return the path from local save or None
+        # Log whether the local save returned a valid path
+        if public_url:
+            logger.info("[generate_audio] Saved audio for turn %s locally: %s", turn, public_url)
+        else:
+            logger.error("[generate_audio] Local save of audio failed to return a path.")
 
-        except Exception as e:
-            logger.error(f"[generate_audio] Error generating audio for turn {turn}: {str(e)}") # Log error
-            logger.error(traceback.format_exc())
-            return None
+        return public_url  # Return the path from local save or None
+
+    @classmethod
+    def _build_script(cls, scenario: Dict[str, str], turn: int) -> str:
+        """
+        Compose the narration script for a scenario.
+
+        Conclusions read the rationale, explanation and grade. The first turn
+        also introduces the user's role when one is set. Other turns read the
+        situation and the prompt.
+
+        Args:
+            scenario: The scenario dictionary
+            turn: The current turn number
+
+        Returns:
+            The text to synthesize
+        """
+        fields = {
+            "situation": scenario.get('situation_description', ''),
+            "user_role": scenario.get('user_role', ''),
+            "user_prompt": scenario.get('user_prompt', ''),
+        }
+        if "grade" in scenario and "grade_explanation" in scenario:
+            return cls.CONCLUSION_SCRIPT.format(
+                rationale=scenario.get('rationale', ''),
+                grade_explanation=scenario['grade_explanation'],
+                grade=scenario['grade'],
+                **fields)
+        if turn == 1 and fields["user_role"]:
+            return cls.OPENING_SCRIPT.format_map(fields)
+        return cls.TURN_SCRIPT.format_map(fields)
+
+    async def _single_flight(self, inflight: Dict[str, "asyncio.Future"],
+                             waiters: Dict[str, int], key: str,
+                             start: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await the request running under key, starting it if there is none.
+
+        Args:
+            inflight: Running requests by key, e.g. self._audio_inflight
+            waiters: How many callers await each running request; only
+                meaningful while inflight still maps the key to that request
+            key: Content address of the request
+            start: Returns the coroutine that performs the request
+
+        Returns:
+            The request's result, shared by every caller that joined it
+        """
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(start())
+            inflight[key] = task
+            waiters[key] = 0
+            task.add_done_callback(
+                lambda t: self._release_inflight(inflight, waiters, key, t))
+
+        waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Stop the request only once nobody is waiting for it any more
+            if inflight.get(key) is task and waiters[key] == 1:
+                task.cancel()
+            raise
+        finally:
+            # Once released, the key's counter may belong to a newer request
+            if inflight.get(key) is task:
+                waiters[key] -= 1
+
+    @staticmethod
+    def _release_inflight(inflight: Dict[str, "asyncio.Future"],
+                          waiters: Dict[str, int], key: str,
+                          task: "asyncio.Future") -> None:
+        """
+        Forget a finished request so later calls start a fresh one.
+
+        Also retrieves the task's exception, which the waiters have already
+        handled, so asyncio does not report it as never retrieved.
+        """
+        if inflight.get(key) is task:
+            del inflight[key]
+            waiters.pop(key, None)
+        if not task.cancelled():
+            task.exception()
 
     async def generate_media_parallel(
             self,
             scenario: Dict[str, str],
             video_prompt: Union[str, List[str]],
-            turn: int = 1) -> Dict[str, Optional[Union[List[Optional[str]], str]]]:
+            turn: int = 1,
+            filename_base: Optional[str] = None) -> Dict[str, Optional[Union[List[Optional[str]], str]]]:
         """
         Generate video(s) and audio in parallel for maximum efficiency.
         If video_prompt is a list, multiple videos are generated.
 
+        At most max_concurrent_generations turns run at once; further calls
+        wait for a slot.
+
         Args:
             scenario: The scenario dictionary for audio generation
             video_prompt: A single prompt string or a list of prompt strings for video generation
             turn: The current turn number
+            filename_base: Name prefix for the turn's local files, from
+                new_filename_base; pass the one given to prewarm_audio so the
+                narration matches the videos. A fresh prefix is used if omitted.
 
         Returns:
             Dictionary containing 'video_urls' (List of URLs or None) and 'audio_url' (URL or None)
         """
+        async with self._gen_sem:
+            return await self._generate_media_parallel(
+                scenario, video_prompt, turn, filename_base or self.new_filename_base(turn))
+
+    async def _generate_media_parallel(
+            self,
+            scenario: Dict[str, str],
+            video_prompt: Union[str, List[str]],
+            turn: int,
+            filename_base: str) -> Dict[str, Optional[Union[List[Optional[str]], str]]]:
+        """
+        Run one turn's video and audio generation; see generate_media_parallel.
+        """
         logger.info(
-            f"Starting parallel generation of media for turn {turn}. Video prompt type: {type(video_prompt)}"
+            "Starting parallel generation of media for turn %s. Video prompt type: %s", turn, type(video_prompt)
         )
-        start_time = time.time()
+        t0 = time.monotonic()
 
         try:
+            if isinstance(video_prompt, str):
+                # Common case: one video and the narration, no prompt bookkeeping
+                logger.info("Received a single video prompt. Creating one video coroutine.")
+                video_result, audio_result = await self._run_media_tasks([
+                    self.generate_video(video_prompt, turn=turn, filename=f"{filename_base}.mp4"),
+                    self.generate_audio(scenario, turn=turn, filename=f"{filename_base}.mp3"),
+                ])
+                video_url = self._unwrap(
+                    f"Video generation task 1 (prompt: '{video_prompt[:50]}...')", video_result)
+                audio_url = self._unwrap("Audio generation task", audio_result)
+                logger.info(
+                    "Parallel media generation for turn %s completed in %.2f seconds. Videos: %s, Audio: %s", turn, time.monotonic() - t0, [video_url], audio_url
+                )
+                return {'video_urls': [video_url], 'audio_url': audio_url}
+
             video_coroutines = []
+            video_labels: List[str] = []  # prompt behind each video coroutine
+            video_slots: List[int] = []  # video coroutine answering each valid prompt
             if isinstance(video_prompt, list):
-                logger.info(f"Received {len(video_prompt)} video prompts. Creating multiple video coroutines.")
-                
-                # Create a wrapper to add delays between video generation requests
-                async def delayed_video_generation(prompt, turn, delay):
-                    """Generate video with a delay to avoid overwhelming the API"""
-                    if delay > 0:
-                        logger.info(f"Waiting {delay:.1f}s before starting video generation...")
-                        await asyncio.sleep(delay)
-                    return await self.generate_video(prompt, turn=turn)
-                
+                logger.info("Received %s video prompts. Creating multiple video coroutines.", len(video_prompt))
+
+                # Identical prompts in one turn share a single request, so a
+                # repeated prompt does not spend a second unit of provider quota
+                prompt_slots: Dict[str, int] = {}
                 for i, single_prompt in enumerate(video_prompt):
                     if isinstance(single_prompt, str):
-                        # Add 2 second delay between each video generation request to avoid rate limiting
-                        delay = i * 2.0
-                        logger.info(f"[{time.time():.2f}] Creating video coroutine {i+1} of {len(video_prompt)} with {delay:.1f}s delay")
-                        video_coroutines.append(delayed_video_generation(single_prompt, turn, delay))
+                        if single_prompt not in prompt_slots:
+                            # Pacing against HuggingFace rate limits happens in
+                            # generate_video via the shared token bucket
+                            logger.debug("[+%.3fs] Creating video coroutine for prompt %d of %d",
+                                         time.monotonic() - t0, i + 1, len(video_prompt))
+                            prompt_slots[single_prompt] = len(video_coroutines)
+                            video_coroutines.append(self.generate_video(
+                                single_prompt, turn=turn, filename=f"{filename_base}_{i + 1}.mp4"))
+                            video_labels.append(single_prompt)
+                        else:
+                            logger.info("Video prompt %d duplicates an earlier prompt; reusing its result.", i + 1)
+                        video_slots.append(prompt_slots[single_prompt])
                     else:
-                        logger.warning(f"Item at index {i} in video_prompt list is not a string: {type(single_prompt)}. Skipping.")
-            elif isinstance(video_prompt, str):
-                logger.info("Received a single video prompt. Creating one video coroutine.")
-                video_coroutines.append(self.generate_video(video_prompt, turn=turn))
+                        logger.warning("Item at index %s in video_prompt list is not a string: %s. Skipping.", i, type(single_prompt))
             else:
-                logger.error(f"Invalid video_prompt type: {type(video_prompt)}. Expected str or list of str.")
+                logger.error("Invalid video_prompt type: %s. Expected str or list of str.", type(video_prompt))
                 return {'video_urls': None, 'audio_url': None} # Or handle error appropriately
 
             if not video_coroutines:
                 logger.warning("No valid video coroutines created. Proceeding with audio only.")
                 # Fallthrough to let audio generate, video_urls will be None or empty
 
-            logger.info(
-                f"[{time.time():.2f}] Creating audio coroutine...")
-            audio_coro = self.generate_audio(scenario, turn=turn)
+            logger.debug("[+%.3fs] Creating audio coroutine...", time.monotonic() - t0)
+            audio_coro = self.generate_audio(scenario, turn=turn, filename=f"{filename_base}.mp3")
 
-            # Combine video and audio tasks for asyncio.gather
-            # Video tasks are at the beginning of the 'all_tasks' list
+            # Combine video and audio tasks; video tasks are at the beginning
+            # of the 'all_tasks' list
             all_tasks = video_coroutines + [audio_coro]
 
-            logger.info(
-                f"[{time.time():.2f}] Calling asyncio.gather for {len(video_coroutines)} video task(s) and 1 audio task..."
-            )
-            results = await asyncio.gather(*all_tasks, return_exceptions=True)
-            logger.info(f"[{time.time():.2f}] asyncio.gather completed.")
-            logger.info(f"[generate_media_parallel] Raw results from asyncio.gather for turn {turn}: {results}") # Log raw results
+            logger.debug("[+%.3fs] Running %d video task(s) and 1 audio task...",
+                         time.monotonic() - t0, len(video_coroutines))
+            results = await self._run_media_tasks(all_tasks)
+            logger.debug("[+%.3fs] Media tasks completed.", time.monotonic() - t0)
+            logger.debug("[generate_media_parallel] Raw results from media tasks for turn %s: %s", turn, results)
 
-            video_urls_list: List[Optional[str]] = []
             num_video_tasks = len(video_coroutines)
 
             # Process video results
-            logger.info(f"[{time.time():.2f}] Processing {num_video_tasks} video result(s)...")
-            for i in range(num_video_tasks):
-                video_result = results[i]
-                current_prompt_snippet = video_prompt[i][:50] if isinstance(video_prompt, list) and i < len(video_prompt) else (video_prompt[:50] if isinstance(video_prompt, str) else "N/A")
-                if isinstance(video_result, Exception):
-                    logger.error(
-                        f"Video generation task {i+1} (prompt: '{current_prompt_snippet}...') failed with exception: {video_result}"
-                    )
-                    tb_str = ''.join(
-                        traceback.format_exception(type(video_result),
-                                                   video_result,
-                                                   video_result.__traceback__))
-                    logger.error(f"Video generation task {i+1} traceback:\\n{tb_str}")
-                    video_urls_list.append(None)
-                elif video_result is None:
-                    logger.warning(f"Video generation task {i+1} (prompt: '{current_prompt_snippet}...') returned None.")
-                    video_urls_list.append(None)
-                else:
-                    video_urls_list.append(video_result)
-                    logger.info(
-                        f"[{time.time():.2f}] Video generation task {i+1} (prompt: '{current_prompt_snippet}...') finished successfully: {video_result}"
-                    )
+            logger.debug("[+%.3fs] Processing %d video result(s)...", time.monotonic() - t0, num_video_tasks)
+            task_urls = [
+                self._unwrap(
+                    f"Video generation task {i+1} (prompt: '{video_labels[i][:50]}...')",
+                    results[i])
+                for i in range(num_video_tasks)
+            ]
+            video_urls_list: List[Optional[str]] = [task_urls[slot] for slot in video_slots]
 
             # Process audio result (it's the last one in the results list)
-            audio_url: Optional[str] = None
-            audio_result = results[num_video_tasks] # Audio result is after all video results
-
-            logger.info(f"[{time.time():.2f}] Processing audio result...")
-            if isinstance(audio_result, Exception):
-                logger.error(
-                    f"Audio generation task failed with exception: {audio_result}"
-                )
-                tb_str = ''.join(
-                    traceback.format_exception(type(audio_result),
-                                               audio_result,
-                                               audio_result.__traceback__))
-                logger.error(f"Audio generation traceback:\\n{tb_str}")
-            elif audio_result is None:
-                logger.warning(f"Audio generation task returned None.")
-            else:
-                audio_url = audio_result
-                logger.info(
-                    f"[{time.time():.2f}] Audio generation task finished successfully: {audio_url}"
-                )
+            logger.debug("[+%.3fs] Processing audio result...", time.monotonic() - t0)
+            audio_url = self._unwrap("Audio generation task", results[num_video_tasks])
 
-            end_time = time.time()
             logger.info(
-                f"Parallel media generation for turn {turn} completed in {end_time - start_time:.2f} seconds. Videos: {video_urls_list}, Audio: {audio_url}"
+                "Parallel media generation for turn %s completed in %.2f seconds. Videos: %s, Audio: %s", turn, time.monotonic() - t0, video_urls_list, audio_url
             )
-
-            logger.info(f"[generate_media_parallel] About to return for turn {turn} - Video URLs: {video_urls_list}, Audio URL: {audio_url}") # Log before returning
             return {'video_urls': video_urls_list, 'audio_url': audio_url}
 
         except Exception as e:
             # Catch any unexpected error during the parallel execution setup or processing
-            logger.error(
-                f"Error occurred within generate_media_parallel itself: {str(e)}"
+            logger.exception(
+                "Error occurred within generate_media_parallel itself: %s", e
             )
-            logger.error(traceback.format_exc())
             return {'video_urls': None, 'audio_url': None}
 
+    @staticmethod
+    async def _run_media_tasks(coroutines: List[Any]) -> List[Any]:
+        """
+        Run media coroutines concurrently, like gather(return_exceptions=True).
+
+        If any task fails because a provider rejected our credentials, the
+        remaining tasks are cancelled rather than left to burn provider time
+        on a turn that cannot complete.
+
+        Args:
+            coroutines: The coroutines to run
+
+        Returns:
+            One result or exception per coroutine, in order
+        """
+        tasks = [asyncio.ensure_future(c) for c in coroutines]
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_EXCEPTION)
+                fatal = next((t.exception() for t in done
+                              if not t.cancelled() and t.exception() is not None
+                              and _is_auth_error(t.exception())), None)
+                if fatal is not None and pending:
+                    logger.error(
+                        "Provider rejected credentials (%s); cancelling %d sibling media task(s)",
+                        fatal, len(pending))
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.wait(pending)
+                    pending = set()
+        finally:
+            # Never leave tasks running if we are cancelled ourselves
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+        return [
+            asyncio.CancelledError("Cancelled after a sibling task failed authentication")
+            if t.cancelled() else (t.exception() or t.result())
+            for t in tasks
+        ]
+
+    @staticmethod
+    def _unwrap(label: str, result: Any) -> Optional[str]:
+        """
+        Turn one asyncio.gather(return_exceptions=True) result into a URL or None.
+
+        Args:
+            label: Description of the task, used in log messages
+            result: The value or exception returned for the task
+
+        Returns:
+            The URL if the task succeeded, None otherwise
+        """
+        if isinstance(result, BaseException):
+            logger.error("%s failed with exception: %s", label, result)
+            # The traceback is only formatted when debug logging is on
+            logger.debug("%s traceback", label, exc_info=result)
+            return None
+        if result is None:
+            logger.warning("%s returned None.", label)
+            return None
+        logger.debug("%s finished successfully: %s", label, result)
+        return result
+
     def get_r2_config(self) -> Dict[str, Any]:
         """
         Get the current R2 configuration.
@@ -495,10 +1014,10 @@ class MediaService:
         """
         return self.r2_config
 
-    def cleanup_media_files(
+    async def cleanup_media_files(
             self, object_keys: Union[str, List[str]]) -> Dict[str, Any]:
         """
-        Delete media files from storage.
+        Delete media files from storage without blocking the event loop.
 
         Args:
             object_keys: Single object key or list of object keys to delete
@@ -514,17 +1033,19 @@ class MediaService:
             keys = [object_keys] if isinstance(object_keys,
                                                str) else object_keys
 
-            # Delete each object
+            # Delete in batches rather than one request per object
+            deleted, errors = await self._run_r2(
+                self.r2_service.delete_files, keys)
+            deleted = set(deleted)
             results = []
             for key in keys:
-                try:
-                    self.r2_service.delete_object(key)
+                if key in deleted:
                     results.append({"key": key, "deleted": True})
-                except Exception as e:
+                else:
                     results.append({
                         "key": key,
                         "deleted": False,
-                        "error": str(e)
+                        "error": errors.get(key, "Not reported as deleted")
                     })
 
             return {
@@ -538,9 +1059,12 @@ class MediaService:
                 "message": f"Error cleaning up media files: {str(e)}"
             }
 
-    def get_r2_status(self) -> Dict[str, Any]:
+    async def get_r2_status(self) -> Dict[str, Any]:
         """
-        Get the status of the Cloudflare R2 service.
+        Get the status of the Cloudflare R2 service without blocking the event loop.
+
+        The result is reused for R2_STATUS_TTL_SECONDS so frequent health
+        probes do not each cost an R2 request.
 
         Returns:
             Dictionary with R2 service status
@@ -548,21 +1072,30 @@ class MediaService:
         if not self.r2_service:
             return {"available": False, "message": "R2 service not configured"}
 
+        fetched_at, cached = self._r2_status_cache
+        if cached is not None and time.monotonic() - fetched_at < R2_STATUS_TTL_SECONDS:
+            return cached
+
+        status = await self._fetch_r2_status()
+        self._r2_status_cache = (time.monotonic(), status)
+        return status
+
+    async def _fetch_r2_status(self) -> Dict[str, Any]:
+        """
+        Query R2 for its current status, bypassing the status cache.
+
+        Returns:
+            Dictionary with R2 service status
+        """
         try:
-            # Test connection by listing a small number of objects
-            objects = self.r2_service.list_objects(max_keys=5)
+            # Test connection with a bodiless HEAD on the bucket
+            await self._run_r2(self.r2_service.head_bucket)
 
             return {
-                "available":
-                True,
-                "message":
-                "R2 service is connected and working",
-                "bucket":
-                self.r2_config.get('bucket_name'),
-                "public_access":
-                self.r2_config.get('public_access'),
-                "sample_objects":
-                [obj.get('Key') for obj in objects.get('Contents', [])][:5]
+                "available": True,
+                "message": "R2 service is connected and working",
+                "bucket": self.r2_config.get('bucket_name'),
+                "public_access": self.r2_config.get('public_access'),
             }
         except Exception as e:
             return {
@@ -583,19 +1116,25 @@ class MediaService:
         try:
             # Create a small test file
             test_content = f"Test file created at {time.ctime()}".encode()
-            test_key = f"test_file_{int(time.time())}.txt"
+            test_key = f"test_file_{uuid.uuid4().hex[:12]}.txt"
 
             # Upload the test file
-            url = self.r2_service.upload_object(test_content, test_key)
-
-            # Download the test file
-            downloaded_content = self.r2_service.download_object(test_key)
-
-            # Verify the content matches
-            content_matches = downloaded_content == test_content
+            url = await self._run_r2(self.r2_service.upload_stream,
+                                     io.BytesIO(test_content), test_key,
+                                     "text/plain")
 
-            # Delete the test file
-            self.r2_service.delete_object(test_key)
+            try:
+                # Download the test file while independently confirming it exists
+                downloaded_content, exists = await asyncio.gather(
+                    self._run_r2(self.r2_service.download_file, test_key),
+                    self._run_r2(self.r2_service.file_exists, test_key))
+
+                # Verify the content matches
+                content_matches = exists and hmac.compare_digest(
+                    downloaded_content, test_content)
+            finally:
+                # Delete the test file even if the checks failed
+                await self._run_r2(self.r2_service.delete_file, test_key)
 
             return {
                 "success": True,
@@ -605,92 +1144,9 @@ class MediaService:
                 "file_size": len(test_content)
             }
         except Exception as e:
-            logger.error(f"Error testing R2 upload/download: {e}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error testing R2 upload/download: %s", e)
 
             return {
                 "success": False,
                 "message": f"Error testing R2 service: {str(e)}"
             }
-
-    async def generate_media_for_turn(self, turn_data, simulation_state, simulation_id):
-        """
-        Generate video and audio for a specific turn in a simulation.
-
-        Args:
-            turn_data: Dictionary containing turn-specific data
-            simulation_state: Dictionary containing simulation-wide state
-            simulation_id: ID of the current simulation
-
-        Returns:
-            Dictionary containing updated data including generated URLs
-        """
-        update_data = {}
-
-        # Generate video
-        video_prompt = turn_data.get("video_prompt", "")
-        video_urls = await self.generate_media_parallel(
-            turn_data.get("selected_scenario", {}), video_prompt, turn_data["turn_number"]
-        )
-        update_data["video_urls"] = video_urls["video_urls"]
-
-        # Generate audio
-        audio_text = ""
-        if turn_data.get("selected_scenario"):
-            scenario = turn_data["selected_scenario"]
-            # Check if it's the final turn (conclusion)
-            if turn_data["turn_number"] == simulation_state["max_turns"] and "grade" in scenario:
-                description = scenario.get("situation_description", "")
-                rationale = scenario.get("rationale", "")
-                grade_explanation = scenario.get("grade_explanation", "")
-                grade = scenario.get("grade", "")
-                # Construct the specific final turn audio text
-                audio_text = f"{description}. {rationale}. {grade_explanation}. Grade {grade}."
-                print(f"[Media Service] Final turn audio text: {audio_text}") # Debugging
-            else:
-                # Standard turn audio text construction
-                description = scenario.get("situation_description", "")
-                # Include user_role and user_prompt only for turn 1, user_prompt for others (excluding final)
-                if turn_data["turn_number"] == 1:
-                    user_role = scenario.get("user_role", "")
-                    user_prompt = scenario.get("user_prompt", "")
-                    audio_text = f"{description} {user_role} {user_prompt}"
-                elif turn_data["turn_number"] < simulation_state["max_turns"]:
-                     user_prompt = scenario.get("user_prompt", "")
-                     audio_text = f"{description} {user_prompt}"
-                # Fallback if somehow description is missing but others aren't
-                if not description and (scenario.get("user_role") or scenario.get("user_prompt")):
-                     audio_text = f"{scenario.get('user_role', '')} {scenario.get('user_prompt', '')}"
-
-                print(f"[Media Service] Standard turn audio text: {audio_text}") # Debugging
-
-
-        if audio_text:
-            try:
-                start_time = time.time()
-                # Use the selected TTS service
-                audio_url = await self.tts_service.synthesize(
-                    text=audio_text, simulation_id=simulation_id
-                )
-                end_time = time.time()
-                print(f"[Perf] TTS Generation took {end_time - start_time:.2f} seconds.")
-
-                if audio_url:
-                    update_data["audio_url"] = audio_url
-                    await self.state_service.update_simulation_turn(
-                        simulation_id, turn_data["turn_number"], {"audio_url": audio_url}
-                    )
-                    # Notify via WebSocket after successful audio generation
-                    await self.notify_progress(simulation_id, "audio_generated")
-                    print(f"[Media Service] Audio generated successfully: {audio_url}")
-                else:
-                     print("[Media Service] Audio generation failed or returned None.")
-
-            except Exception as e:
-                print(f"Error generating audio: {e}")
-                # Log error but continue
-        else:
-            print("[Media Service] No audio text generated for TTS.")
-
-        # Return updated data including the generated URLs
-        return update_data
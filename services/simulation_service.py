@@ -7,11 +7,11 @@ selection, media generation, and state management.
 """
 
 import logging
+from contextvars import ContextVar
 from typing import Dict, Any, List, Optional
 from langchain.chains import LLMChain
 from langchain.prompts import PromptTemplate
 import json
-import traceback
 
 from services.llm_service import LLMService
 from services.state_service import StateService
@@ -20,6 +20,12 @@ from models.simulation import SimulationState, Scenario, LLMLog, DifficultyLevel
 
 logger = logging.getLogger(__name__)
 
+# Simulation whose request is running in the current task. LLM log callbacks
+# fire inside that task, so they attach to the right simulation even when
+# several simulations are processed at once.
+_current_simulation_id: ContextVar[Optional[str]] = ContextVar(
+    "current_simulation_id", default=None)
+
 class SimulationService:
     """
     Service for orchestrating the simulation flow.
@@ -57,18 +63,14 @@ class SimulationService:
             turn_number: The turn number the log belongs to
             llm_log: The LLM log to store
         """
-        # Find the simulation that's currently being processed
-        # This is a simplification - in a real system, we'd need to track which simulation
-        # is associated with each LLM call
-        simulations = self.state_service.get_all_simulations()
-        if not simulations:
-            logger.warning("No simulations found for LLM log")
+        # Find the simulation whose request made this LLM call
+        simulation_id = _current_simulation_id.get()
+        simulation = (self.state_service.get_simulation(simulation_id)
+                      if simulation_id else None)
+        if simulation is None:
+            logger.warning("No active simulation found for LLM log")
             return
 
-        # For now, we'll log to the most recently created simulation
-        simulations.sort(key=lambda s: s.created_at, reverse=True)
-        simulation = simulations[0]
-
         # Only log if developer mode is enabled
         if simulation.developer_mode:
             logger.info(f"Logging LLM interaction for simulation {simulation.simulation_id}, turn {turn_number}")
@@ -86,6 +88,7 @@ class SimulationService:
         Returns:
             The new SimulationState
         """
+        token = None
         try:
             # Create a new simulation state
             simulation = SimulationState()
@@ -94,6 +97,7 @@ class SimulationService:
 
             # Add it to the state service
             self.state_service.create_simulation(simulation)
+            token = _current_simulation_id.set(simulation.simulation_id)
             
             # Start Langfuse session for this simulation.
             # Langfuse integration is not yet wired into LLMService (issue #10):
@@ -129,24 +133,20 @@ class SimulationService:
             logger.info(f"Generated scenario for turn 1")
             scenario_id = scenario.get("id", "unknown_1")
             logger.info(f"Scenario ID: {scenario_id}")
-            logger.debug(f"Scenario Description: {scenario.get('situation_description', '')[:50]}...")
+            logger.debug("Scenario Description: %.50s...", scenario.get('situation_description', ''))
 
             # Convert scenario to the Scenario model object with validation
             try:
-                # Ensure all required fields exist with defaults if missing
+                # Validate the dict in one pass, filling required fields
+                # with defaults where the LLM left them out
                 scenario_id = scenario.get("id", "scenario_1_1")
-                description = scenario.get("situation_description", "Default scenario")
-                rationale = scenario.get("rationale", "Auto-generated")
-                user_role = scenario.get("user_role", "")
-                user_prompt = scenario.get("user_prompt", "What strategy will you implement to address this situation and save the world?")
-
-                scenario_model = Scenario(
-                    id=scenario_id,
-                    situation_description=description,
-                    rationale=rationale,
-                    user_role=user_role,
-                    user_prompt=user_prompt
-                )
+                scenario_model = Scenario.model_validate({
+                    "user_prompt": "What strategy will you implement to address this situation and save the world?",
+                    **scenario,
+                    "id": scenario_id,
+                    "situation_description": scenario.get("situation_description", "Default scenario"),
+                    "rationale": scenario.get("rationale", "Auto-generated"),
+                })
 
                 # Add the scenario to the simulation
                 simulation.add_scenarios(1, [scenario_model])
@@ -154,6 +154,10 @@ class SimulationService:
                 # Automatically select the scenario
                 simulation.select_scenario(1, scenario_id)
 
+                # Start the narration now so TTS overlaps with writing the video prompt
+                filename_base = self.media_service.new_filename_base(1)
+                self.media_service.prewarm_audio(scenario, turn=1, filename_base=filename_base)
+
                 # Generate media prompts - video prompt only
                 video_prompt = await self.llm_service.create_video_prompt(scenario, turn_number=1)
 
@@ -162,7 +166,8 @@ class SimulationService:
 
                 # Generate media synchronously for first turn (same as other turns)
                 # This ensures videos actually get generated
-                media_results = await self.media_service.generate_media_parallel(scenario, video_prompt, turn=1)
+                media_results = await self.media_service.generate_media_parallel(
+                    scenario, video_prompt, turn=1, filename_base=filename_base)
                 
                 # Add media URLs to the simulation state
                 simulation.add_media_urls(1, media_results['video_urls'], media_results['audio_url'])
@@ -175,9 +180,11 @@ class SimulationService:
 
             return simulation
         except Exception as e:
-            logger.error(f"Unexpected error in create_new_simulation: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Unexpected error in create_new_simulation: %s", e)
             raise
+        finally:
+            if token is not None:
+                _current_simulation_id.reset(token)
 
     async def process_user_response(self, simulation_id: str, user_response: str) -> Optional[SimulationState]:
         """
@@ -190,13 +197,15 @@ class SimulationService:
         Returns:
             The updated SimulationState, or None if the simulation wasn't found
         """
+        token = None
         try:
             # Get the simulation
             simulation = self.state_service.get_simulation(simulation_id)
             if not simulation:
                 logger.error(f"Simulation not found: {simulation_id}")
                 return None
-            
+            token = _current_simulation_id.set(simulation.simulation_id)
+
             # Ensure Langfuse session is active (reinitialize if needed).
             # Guarded: LLMService may not have Langfuse wired up yet (issue #10).
             if hasattr(self.llm_service, "current_session_id") and not self.llm_service.current_session_id:
@@ -235,20 +244,20 @@ class SimulationService:
             
             logger.info(f"[SUBMISSION] Check: submission_count({simulation.submission_count}) >= max_turns({simulation.max_turns}) = {should_generate_conclusion}")
 
+            # Conclusions grade the user's response to the current turn; a
+            # regular turn overrides the turn numbers and prompt below
+            context = {
+                "simulation_history": simulation.get_history_text(),
+                "current_turn_number": current_turn,  # Keep current_turn_number the same but the template will know to use FINAL_TURN_TEMPLATE
+                "previous_turn_number": current_turn - 1,
+                "user_prompt_for_this_turn": user_response,  # Pass the user's final response
+                "max_turns": simulation.max_turns,
+                "difficulty": simulation.difficulty.value
+            }
+
             if should_generate_conclusion:
                 # Generate the CONCLUSION after max submissions reached
                 logger.info(f"🎯 [CONCLUSION] Submission #{simulation.submission_count} reached max_turns({simulation.max_turns}). Generating conclusion with grade now.")
-                logger.info(f"[CONCLUSION] Setting up context for conclusion generation...")
-
-                context = {
-                    "simulation_history": simulation.get_history_text(),
-                    "current_turn_number": current_turn,  # Keep current_turn_number the same but the template will know to use FINAL_TURN_TEMPLATE
-                    "previous_turn_number": current_turn - 1,
-                    "user_prompt_for_this_turn": user_response,  # Pass the user's final response
-                    "max_turns": simulation.max_turns,
-                    "difficulty": simulation.difficulty.value
-                }
-
                 logger.info(f"[CONCLUSION] Context prepared: turn={context['current_turn_number']}, has_user_prompt={bool(context['user_prompt_for_this_turn'])}")
                 
                 # Mark as complete since we've reached max submissions
@@ -268,27 +277,16 @@ class SimulationService:
                     logger.error(f"[ERROR] Attempting to generate turn {next_regular_turn} when max_turns is {simulation.max_turns}. Forcing conclusion.")
                     # Force conclusion generation
                     simulation.is_complete = True
-                    context = {
-                        "simulation_history": simulation.get_history_text(),
-                        "current_turn_number": current_turn,
-                        "previous_turn_number": current_turn - 1,
-                        "user_prompt_for_this_turn": user_response,
-                        "max_turns": simulation.max_turns,
-                        "difficulty": simulation.difficulty.value
-                    }
                     logger.info(f"[CONCLUSION] Forced conclusion generation due to turn overflow")
                 else:
                     simulation.current_turn_number = next_regular_turn
                     logger.info(f"[SUBMISSION] Submission #{simulation.submission_count}: Generating next scenario for turn {next_regular_turn}.")
                     
-                    context = {
-                        "simulation_history": simulation.get_history_text(),
+                    context.update({
                         "current_turn_number": next_regular_turn,
                         "previous_turn_number": current_turn,
                         "user_prompt_for_this_turn": "", # Default for regular next turn
-                        "max_turns": simulation.max_turns,
-                        "difficulty": simulation.difficulty.value
-                    }
+                    })
                     # is_complete remains False
 
             # Add the updated simulation to state service before generating the next scenario
@@ -304,7 +302,7 @@ class SimulationService:
                 logger.info(f"Generated scenario for turn {simulation.current_turn_number}")
                 scenario_id = scenario.get("id", f"scenario_{simulation.current_turn_number}_1")
                 logger.info(f"Scenario ID: {scenario_id}")
-                logger.debug(f"Scenario Description: {scenario.get('situation_description', '')[:50]}...")
+                logger.debug("Scenario Description: %.50s...", scenario.get('situation_description', ''))
                 
                 # Debug: Log if grade is present in raw scenario
                 if "grade" in scenario:
@@ -320,18 +318,9 @@ class SimulationService:
                 # For conclusion turn, LLMService will include grade/grade_explanation in 'scenario' object
                 # For playable turns, it will include user_role/user_prompt.
 
-                scenario_model_fields = {
-                    "id": scenario_id,
-                    "situation_description": description,
-                    "rationale": rationale
-                }
-                if "user_role" in scenario: scenario_model_fields["user_role"] = scenario["user_role"]
-                if "user_prompt" in scenario: scenario_model_fields["user_prompt"] = scenario["user_prompt"]
-                if "grade" in scenario: 
-                    scenario_model_fields["grade"] = scenario["grade"]
+                if "grade" in scenario:
                     logger.info(f"[CONCLUSION] ✅ Grade found in scenario: {scenario['grade']}/100")
-                if "grade_explanation" in scenario: 
-                    scenario_model_fields["grade_explanation"] = scenario["grade_explanation"]
+                if "grade_explanation" in scenario:
                     logger.info(f"[CONCLUSION] Grade explanation: {scenario['grade_explanation'][:100]}...")
                 
                 # Log if this is a conclusion scenario
@@ -340,7 +329,14 @@ class SimulationService:
                 else:
                     logger.info(f"[TURN {simulation.current_turn_number}] Creating regular scenario model (no grade)")
 
-                scenario_model = Scenario(**scenario_model_fields)
+                # Validate the whole dict in one pass so optional fields
+                # (user_role, user_prompt, grade, ...) carry over as returned
+                scenario_model = Scenario.model_validate({
+                    **scenario,
+                    "id": scenario_id,
+                    "situation_description": description,
+                    "rationale": rationale,
+                })
 
                 # CRITICAL FIX: Store conclusion at turn 4 to avoid overwriting turn 3
                 # If this is a conclusion (has grade), store it at turn_number + 1
@@ -355,6 +351,10 @@ class SimulationService:
                 # Automatically select the scenario
                 simulation.select_scenario(storage_turn, scenario_id)
 
+                # Start the narration now so TTS overlaps with writing the video prompt
+                filename_base = self.media_service.new_filename_base(storage_turn)
+                self.media_service.prewarm_audio(scenario, turn=storage_turn, filename_base=filename_base)
+
                 # Generate media prompts - video prompt only
                 video_prompt = await self.llm_service.create_video_prompt(scenario, turn_number=storage_turn)
 
@@ -362,7 +362,8 @@ class SimulationService:
                 simulation.add_media_prompts(storage_turn, video_prompt, None)
 
                 # Generate media (video and audio in parallel) - THIS WILL RUN FOR CONCLUSION TURN TOO
-                media_results = await self.media_service.generate_media_parallel(scenario, video_prompt, turn=storage_turn)
+                media_results = await self.media_service.generate_media_parallel(
+                    scenario, video_prompt, turn=storage_turn, filename_base=filename_base)
 
                 # Add media URLs to the simulation state
                 simulation.add_media_urls(storage_turn, media_results['video_urls'], media_results['audio_url'])
@@ -406,8 +407,7 @@ class SimulationService:
 
             return simulation
         except Exception as e:
-            logger.error(f"Unexpected error in process_user_response: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Unexpected error in process_user_response: %s", e)
             try:
                 # Try to recover the simulation state if possible
                 if 'simulation' in locals() and simulation:
@@ -416,6 +416,9 @@ class SimulationService:
             except:
                 pass
             raise
+        finally:
+            if token is not None:
+                _current_simulation_id.reset(token)
 
     async def toggle_developer_mode(self, simulation_id: str, enabled: bool) -> Optional[SimulationState]:
         """
@@ -443,8 +446,7 @@ class SimulationService:
 
             return simulation
         except Exception as e:
-            logger.error(f"Error toggling developer mode in SimulationService: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error toggling developer mode in SimulationService: %s", e)
             raise
 
     async def change_difficulty(self, simulation_id: str, difficulty: str) -> Optional[SimulationState]:
@@ -474,6 +476,5 @@ class SimulationService:
 
             return simulation
         except Exception as e:
-            logger.error(f"Error changing difficulty in SimulationService: {str(e)}")
-            logger.error(traceback.format_exc())
+            logger.exception("Error changing difficulty in SimulationService: %s", e)
             raise
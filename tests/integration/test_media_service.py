@@ -144,7 +144,7 @@ class TestMediaService:
     @pytest.mark.asyncio
     async def test_r2_status(self, media_service):
         """Test getting R2 storage status."""
-        r2_status = media_service.get_r2_status()
+        r2_status = await media_service.get_r2_status()
         
         assert r2_status is not None
         assert "available" in r2_status
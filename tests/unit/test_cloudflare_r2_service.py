@@ -8,7 +8,7 @@ retrieving media files in Cloudflare R2.
 import io
 import pytest
 import unittest.mock as mock
-from services.cloudflare_r2_service import CloudflareR2Service
+from services.cloudflare_r2_service import CloudflareR2Service, CloudflareR2ServiceError
 from botocore.exceptions import ClientError
 
 # Use pytest fixtures to provide mock parameters
@@ -316,4 +316,95 @@ def test_upload_video_error(r2_credentials, mock_boto3_client):
     
     # Expect the error to be propagated
     with pytest.raises(ClientError):
-        service.upload_video(b'test data', 'test.mp4') 
\ No newline at end of file
+        service.upload_video(b'test data', 'test.mp4') 
+# Test file existence check
+def test_file_exists(r2_credentials, mock_boto3_client):
+    """Test file_exists maps a 404 to False and success to True."""
+    service = CloudflareR2Service(**r2_credentials)
+
+    assert service.file_exists('audio/tts-cache/abc.mp3') is True
+
+    error_response = {'Error': {'Code': '404'}}
+    mock_boto3_client.return_value.head_object.side_effect = ClientError(error_response, 'HeadObject')
+    assert service.file_exists('audio/tts-cache/abc.mp3') is False
+
+# Test bucket health check
+def test_head_bucket(r2_credentials, mock_boto3_client):
+    """Test head_bucket returns True and wraps client errors."""
+    service = CloudflareR2Service(**r2_credentials)
+
+    assert service.head_bucket() is True
+
+    error_response = {'Error': {'Code': '403'}}
+    mock_boto3_client.return_value.head_bucket.side_effect = ClientError(error_response, 'HeadBucket')
+    with pytest.raises(CloudflareR2ServiceError):
+        service.head_bucket()
+
+# Test streaming upload
+def test_upload_stream(r2_credentials, mock_boto3_client):
+    """Test streaming a file-like object with a multipart transfer config."""
+    service = CloudflareR2Service(**r2_credentials, public_access=True, public_url='https://pub.example.com')
+
+    data = io.BytesIO(b'x' * 16)
+    data.read(4)  # A partially consumed stream must be rewound before upload
+    url = service.upload_stream(data, 'videos/big.mp4', 'video/mp4')
+
+    assert url == 'https://pub.example.com/videos/big.mp4'
+    call = mock_boto3_client.return_value.upload_fileobj.call_args
+    assert call.args[1:] == (r2_credentials['bucket_name'], 'videos/big.mp4')
+    assert call.kwargs['ExtraArgs'] == {'ContentType': 'video/mp4', 'ACL': 'public-read'}
+    assert call.kwargs['Config'].multipart_chunksize == 8 * 1024 * 1024
+    assert data.tell() == 0
+
+# Test batched deletion
+def test_delete_files_batches(r2_credentials, mock_boto3_client):
+    """Test delete_files splits keys into DeleteObjects batches and merges results."""
+    service = CloudflareR2Service(**r2_credentials)
+    keys = [f'videos/{i}.mp4' for i in range(1001)]
+
+    mock_boto3_client.return_value.delete_objects.side_effect = [
+        {'Deleted': [{'Key': k} for k in keys[1:1000]],
+         'Errors': [{'Key': keys[0], 'Code': 'AccessDenied', 'Message': 'Access Denied'}]},
+        {'Deleted': [{'Key': keys[1000]}]},
+    ]
+
+    deleted, errors = service.delete_files(keys)
+
+    assert mock_boto3_client.return_value.delete_objects.call_count == 2
+    first_batch = mock_boto3_client.return_value.delete_objects.call_args_list[0].kwargs
+    assert len(first_batch['Delete']['Objects']) == 1000
+    assert len(deleted) == 1000
+    assert errors == {keys[0]: 'Access Denied'}
+
+# Test presigned URL reuse
+def test_generate_presigned_url_is_reused(r2_credentials, mock_boto3_client):
+    """Test a presigned URL is signed once and reused until near expiry."""
+    service = CloudflareR2Service(**r2_credentials)
+
+    with mock.patch('services.cloudflare_r2_service.time.monotonic', return_value=1000.0):
+        first = service.generate_presigned_url('videos/test_video.mp4', expiry=100)
+        second = service.generate_presigned_url('videos/test_video.mp4', expiry=100)
+    assert first == second
+    assert mock_boto3_client.return_value.generate_presigned_url.call_count == 1
+
+    # Past 90% of the lifetime the URL is signed again
+    with mock.patch('services.cloudflare_r2_service.time.monotonic', return_value=1091.0):
+        service.generate_presigned_url('videos/test_video.mp4', expiry=100)
+    assert mock_boto3_client.return_value.generate_presigned_url.call_count == 2
+
+# Test retry backoff
+def test_with_retry_backs_off_exponentially(r2_credentials, mock_boto3_client):
+    """Test transient network errors are retried with doubling delays."""
+    from botocore.exceptions import EndpointConnectionError
+    service = CloudflareR2Service(**r2_credentials, max_retries=3, retry_delay=1)
+    operation = mock.Mock(side_effect=[
+        EndpointConnectionError(endpoint_url='https://example.com'),
+        EndpointConnectionError(endpoint_url='https://example.com'),
+        'ok',
+    ])
+
+    with mock.patch('services.cloudflare_r2_service.time.sleep') as sleep, \
+            mock.patch('services.cloudflare_r2_service.random.uniform', return_value=1.0):
+        assert service._with_retry(operation) == 'ok'
+
+    assert [c.args[0] for c in sleep.call_args_list] == [1, 2]
@@ -0,0 +1,89 @@
+"""
+Tests for GroqTTSService narration splitting.
+
+Long narration is split at sentence boundaries, synthesized concurrently and
+joined back into one WAV clip; short narration is still a single request.
+"""
+import io
+import wave
+
+import pytest
+
+import services.groq_tts_service as tts_mod
+from services.groq_tts_service import GroqTTSService, _join_wav, _split_for_tts
+
+
+def _wav(frames: bytes, rate: int = 24000) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames)
+    return buf.getvalue()
+
+
+def test_split_groups_sentences_up_to_limit():
+    text = "One two. Three four! Five six? Seven."
+
+    assert _split_for_tts(text, max_chars=20) == ["One two. Three four!", "Five six? Seven."]
+    assert _split_for_tts(text, max_chars=1000) == [text]
+
+
+def test_split_keeps_overlong_sentence_whole():
+    assert _split_for_tts("A very long sentence here. Short.", max_chars=5) == [
+        "A very long sentence here.", "Short."]
+
+
+def test_join_wav_concatenates_frames():
+    joined, rate = _join_wav([_wav(b"\x01\x00"), _wav(b"\x02\x00\x03\x00")])
+
+    with wave.open(io.BytesIO(joined), 'rb') as r:
+        assert r.getnframes() == 3
+        assert r.readframes(3) == b"\x01\x00\x02\x00\x03\x00"
+    assert rate == 24000
+
+
+def test_join_wav_rejects_mismatched_formats():
+    with pytest.raises(ValueError):
+        _join_wav([_wav(b"\x01\x00"), _wav(b"\x02\x00", rate=22050)])
+
+
+@pytest.mark.asyncio
+async def test_long_narration_is_synthesized_in_parts(monkeypatch):
+    monkeypatch.setattr(tts_mod, "TTS_CHUNK_CHARS", 20)
+    service = GroqTTSService(groq_api_key="x")
+    calls = []
+
+    def fake_blocking(text, voice):
+        calls.append(text)
+        return _wav(b"\x01\x00")
+
+    service._blocking_generate_and_read = fake_blocking
+
+    audio, rate = await service.generate_audio("One two. Three four! Five six? Seven.")
+
+    assert sorted(calls) == ["Five six? Seven.", "One two. Three four!"]
+    with wave.open(io.BytesIO(audio), 'rb') as r:
+        assert r.getnframes() == 2
+
+
+@pytest.mark.asyncio
+async def test_mismatched_parts_fall_back_to_one_request(monkeypatch):
+    monkeypatch.setattr(tts_mod, "TTS_CHUNK_CHARS", 20)
+    service = GroqTTSService(groq_api_key="x")
+    text = "One two. Three four! Five six? Seven."
+    calls = []
+
+    def fake_blocking(chunk, voice):
+        calls.append(chunk)
+        return _wav(b"\x01\x00", rate=22050 if chunk.startswith("Five") else 24000)
+
+    service._blocking_generate_and_read = fake_blocking
+
+    audio, _ = await service.generate_audio(text)
+
+    assert calls[-1] == text
+    assert len(calls) == 3
+    with wave.open(io.BytesIO(audio), 'rb') as r:
+        assert r.getnframes() == 1
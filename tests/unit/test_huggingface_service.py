@@ -0,0 +1,42 @@
+"""
+Tests for HuggingFaceService retry handling.
+
+Rejected requests (4xx other than auth) fail identically on every attempt,
+so they return None without consuming the remaining retries.
+"""
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.huggingface_service import HuggingFaceService
+
+
+class _ProviderError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = MagicMock(status_code=status_code)
+
+
+@pytest.fixture
+def service():
+    """HuggingFaceService with a mocked InferenceClient."""
+    service = HuggingFaceService(api_key="x")
+    service.client = MagicMock()
+    return service
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_is_not_retried(service):
+    service.client.text_to_video.side_effect = _ProviderError(400)
+
+    assert await service.generate_video("a dam bursts", max_retries=3) is None
+    service.client.text_to_video.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_server_error_is_retried(service, monkeypatch):
+    monkeypatch.setattr("services.huggingface_service._backoff_delay", lambda n: 0)
+    service.client.text_to_video.side_effect = _ProviderError(503)
+
+    assert await service.generate_video("a dam bursts", max_retries=3) is None
+    assert service.client.text_to_video.call_count == 3
@@ -159,6 +159,27 @@ async def test_create_idea_final_turn_fallback_parsing():
     assert log_args[1].model_name == "qwen-qwq-32b"
 
 
+@pytest.mark.asyncio
+async def test_create_video_prompt_reuses_cached_scenes(llm_service):
+    """
+    Tests that a second create_video_prompt call for the same scenario text
+    returns the cached scenes without another LLM round-trip.
+    """
+    llm_service.log_callback = AsyncMock()
+    scenes = ["scene one", "scene two", "scene three", "scene four"]
+    mock_chain = MagicMock()
+    mock_chain.arun = AsyncMock(return_value=json.dumps({"scenes": scenes}))
+    scenario = {"situation_description": "Giant snails block the highway."}
+
+    with patch('services.llm_service.LLMChain', return_value=mock_chain):
+        first = await llm_service.create_video_prompt(scenario, turn_number=1)
+        second = await llm_service.create_video_prompt(scenario, turn_number=2)
+
+    assert first == scenes
+    assert second == scenes
+    mock_chain.arun.assert_awaited_once()
+
+
 @pytest.mark.asyncio
 async def test_create_idea_live_groq_call():
     """
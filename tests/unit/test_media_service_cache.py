@@ -0,0 +1,180 @@
+"""
+Tests for the content-addressed media caches in MediaService.
+
+Identical scripts read by the same voice must not be re-synthesized: the
+second call is served from the in-process cache, and a fresh process finds
+the earlier upload in R2 under audio/tts-cache/<sha256>.mp3. Videos are
+cached the same way under videos/video-cache/.
+"""
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+import services.media_service as ms_mod
+
+
+SCENARIO = {
+    "situation_description": "A dam is failing.",
+    "user_prompt": "What do you do?",
+}
+
+
+@pytest.fixture
+def service():
+    """MediaService with mocked Groq TTS and a public R2 bucket."""
+    service = ms_mod.MediaService(huggingface_api_key="x", groq_api_key="y")
+    service.r2_config["public_access"] = True
+    service.groq_tts_service = MagicMock()
+    service.groq_tts_service.default_voice = "Aaliyah-PlayAI"
+    service.groq_tts_service.generate_audio = AsyncMock(return_value=(b"wav", 24000))
+    service.r2_service = MagicMock()
+    service.r2_service.file_exists.return_value = False
+    service.r2_service.upload_audio.side_effect = (
+        lambda data, name: f"https://cdn.example.com/audio/{name}")
+    return service
+
+
+@pytest.fixture
+def video_service(service):
+    """The service fixture with a mocked HuggingFace video provider."""
+    service.huggingface_service = MagicMock()
+    service.huggingface_service.model = "Wan-AI/Wan2.2-TI2V-5B"
+    service.huggingface_service.generate_video_bytes = AsyncMock(return_value=b"mp4")
+    service.r2_service.upload_video.side_effect = (
+        lambda data, filename: f"https://cdn.example.com/videos/{filename}")
+    return service
+
+
+@pytest.mark.asyncio
+async def test_repeated_script_is_synthesized_once(service):
+    first = await service.generate_audio(SCENARIO, turn=2)
+    second = await service.generate_audio(SCENARIO, turn=2)
+
+    assert first == second
+    assert "/audio/tts-cache/" in first
+    service.groq_tts_service.generate_audio.assert_awaited_once()
+    service.r2_service.upload_audio.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_r2_hit_skips_tts(service):
+    service.r2_service.file_exists.return_value = True
+    service.r2_service.get_file_url.return_value = "https://cdn.example.com/audio/tts-cache/k.mp3"
+
+    url = await service.generate_audio(SCENARIO, turn=2)
+
+    assert url == "https://cdn.example.com/audio/tts-cache/k.mp3"
+    service.groq_tts_service.generate_audio.assert_not_awaited()
+    service.r2_service.upload_audio.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_presigned_urls_are_not_memoized(service):
+    service.r2_config["public_access"] = False
+
+    await service.generate_audio(SCENARIO, turn=2)
+
+    assert service._audio_cache == {}
+
+
+def test_cache_key_depends_on_voice(service):
+    key_a = service._audio_cache_key("hello")
+    service.groq_tts_service.default_voice = "Other-PlayAI"
+    assert service._audio_cache_key("hello") != key_a
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_scripts_share_one_tts_call(service):
+    async def slow_tts(script):
+        await asyncio.sleep(0.01)
+        return (b"wav", 24000)
+
+    service.groq_tts_service.generate_audio = AsyncMock(side_effect=slow_tts)
+
+    first, second = await asyncio.gather(
+        service.generate_audio(SCENARIO, turn=2),
+        service.generate_audio(SCENARIO, turn=2))
+
+    assert first == second
+    service.groq_tts_service.generate_audio.assert_awaited_once()
+    assert service._audio_inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_video_prompts_share_one_generation(video_service):
+    async def slow_video(prompt, turn, max_retries):
+        await asyncio.sleep(0.01)
+        return b"mp4"
+
+    video_service.huggingface_service.generate_video_bytes.side_effect = slow_video
+
+    first, second = await asyncio.gather(
+        video_service.generate_video("a dam bursts", turn=1),
+        video_service.generate_video("a dam bursts", turn=1))
+
+    assert first == second
+    video_service.huggingface_service.generate_video_bytes.assert_awaited_once()
+    assert video_service._video_inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_repeated_video_prompt_is_generated_once(video_service):
+    first = await video_service.generate_video("a dam bursts", turn=1)
+    second = await video_service.generate_video("a dam bursts", turn=2)
+
+    assert first == second
+    assert "/videos/video-cache/" in first
+    video_service.huggingface_service.generate_video_bytes.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_invalidated_video_is_generated_again(video_service):
+    video_service.r2_service.delete_files.side_effect = lambda keys: (keys, {})
+    first = await video_service.generate_video("a dam bursts", turn=1)
+    cache_key = video_service._video_cache_key("a dam bursts", None)
+
+    assert await video_service.invalidate_video_cache(cache_key) is True
+    await video_service.generate_video("a dam bursts", turn=2)
+
+    video_service.r2_service.delete_files.assert_called_once_with(
+        [f"videos/video-cache/{cache_key}.mp4"])
+    assert first.endswith(f"{cache_key}.mp4")
+    assert video_service.huggingface_service.generate_video_bytes.await_count == 2
+
+
+def test_build_script_picks_template_by_scenario_shape():
+    build = ms_mod.MediaService._build_script
+    opening = dict(SCENARIO, user_role="You are the mayor.")
+
+    assert build(opening, 1) == "A dam is failing. You are the mayor. What do you do?"
+    assert build(opening, 2) == "A dam is failing. What do you do?"
+    assert build(dict(SCENARIO, rationale="Fast.", grade_explanation="Good.", grade="A"), 3) == (
+        "A dam is failing. Fast. Good. Your final grade is: A.")
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_narration_is_reused_by_generate_audio(service):
+    service.r2_config["public_access"] = False
+
+    service.prewarm_audio(SCENARIO, turn=2)
+    await asyncio.sleep(0)
+    url = await service.generate_audio(SCENARIO, turn=2)
+
+    assert "/audio/tts-cache/" in url
+    service.groq_tts_service.generate_audio.assert_awaited_once()
+    assert service._prewarmed_audio == {}
+
+
+@pytest.mark.asyncio
+async def test_prewarmed_narration_is_saved_under_the_turn_prefix(service, monkeypatch):
+    saved = []
+    monkeypatch.setattr(ms_mod, "save_media_file",
+                        lambda data, kind, name: saved.append(name) or f"/media/audio/{name}")
+    service.r2_service = None
+
+    service.prewarm_audio(SCENARIO, turn=2, filename_base="turn_2_abc")
+    url = await service.generate_audio(SCENARIO, turn=2, filename="ignored.mp3")
+
+    assert url == "/media/audio/turn_2_abc.mp3"
+    assert saved == ["turn_2_abc.mp3"]
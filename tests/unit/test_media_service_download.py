@@ -0,0 +1,82 @@
+"""
+Tests for streaming provider video downloads through MediaService.
+
+A video returned by URL is spooled to a temporary file and handed to R2 as a
+stream, rather than being read into one bytes object and re-uploaded.
+"""
+from unittest.mock import AsyncMock, MagicMock
+
+import httpx
+import pytest
+
+import services.media_service as ms_mod
+
+
+VIDEO_URL = "https://provider.example.com/out.mp4"
+
+
+@pytest.fixture
+def service():
+    """MediaService whose provider hands back VIDEO_URL, with a mocked R2."""
+    service = ms_mod.MediaService(huggingface_api_key="x", groq_api_key="y")
+    service.huggingface_service = MagicMock()
+    service.huggingface_service.model = "Wan-AI/Wan2.2-TI2V-5B"
+    service.huggingface_service.generate_video_bytes = AsyncMock(return_value=VIDEO_URL)
+    service.r2_service = MagicMock()
+    service.r2_service.file_exists.return_value = False
+    return service
+
+
+@pytest.mark.asyncio
+async def test_downloaded_video_is_streamed_to_r2(service, monkeypatch):
+    # Force the spool to spill to disk so the large-file path is exercised
+    monkeypatch.setattr(ms_mod, "VIDEO_SPOOL_MAX_BYTES", 16)
+    body = b"x" * 1000
+    uploaded = {}
+
+    def upload_stream(file_obj, object_key, content_type):
+        uploaded["data"] = file_obj.read()
+        return f"https://cdn.example.com/{object_key}"
+
+    service._http = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=body)))
+    service.r2_service.upload_stream.side_effect = upload_stream
+
+    url = await service.generate_video("a dam bursts", turn=1)
+
+    assert url.startswith("https://cdn.example.com/videos/video-cache/")
+    assert uploaded["data"] == body
+    service.r2_service.upload_video.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_download_returns_none(service):
+    service._http = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(404)))
+
+    assert await service.generate_video("a dam bursts", turn=1) is None
+    service.r2_service.upload_stream.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_generated_bytes_are_uploaded_once_under_cache_key(service):
+    service.huggingface_service.generate_video_bytes.return_value = b"mp4"
+    service.r2_service.upload_video.side_effect = (
+        lambda data, filename: f"https://cdn.example.com/videos/{filename}")
+
+    url = await service.generate_video("a dam bursts", turn=1)
+
+    assert url.startswith("https://cdn.example.com/videos/video-cache/")
+    service.r2_service.upload_video.assert_called_once()
+    service.r2_service.upload_stream.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_r2_self_test_removes_object_when_download_fails(service):
+    service.r2_service.upload_stream.return_value = "https://cdn.example.com/t.txt"
+    service.r2_service.download_file.side_effect = RuntimeError("boom")
+
+    result = await service.test_r2_upload_download()
+
+    assert result["success"] is False
+    service.r2_service.delete_file.assert_called_once()
@@ -0,0 +1,89 @@
+"""
+Tests for task handling in MediaService.generate_media_parallel.
+
+An authentication failure on one side (e.g. Groq 401) must cancel the
+in-flight sibling tasks instead of waiting for an expensive video job that
+can no longer be used; ordinary failures must not affect the other tasks.
+"""
+import asyncio
+
+import pytest
+
+import services.media_service as ms_mod
+
+
+class _AuthError(Exception):
+    status_code = 401
+
+
+@pytest.fixture
+def service():
+    """MediaService whose generate_video/generate_audio each test replaces."""
+    return ms_mod.MediaService(huggingface_api_key="x", groq_api_key="y")
+
+
+@pytest.mark.asyncio
+async def test_auth_failure_cancels_sibling_video(service):
+    video_cancelled = []
+
+    async def slow_video(*args, **kwargs):
+        try:
+            await asyncio.sleep(30)
+        except asyncio.CancelledError:
+            video_cancelled.append(True)
+            raise
+        return "https://example.com/v.mp4"
+
+    async def failing_audio(*args, **kwargs):
+        raise _AuthError("invalid api key")
+
+    service.generate_video = slow_video
+    service.generate_audio = failing_audio
+
+    result = await asyncio.wait_for(
+        service.generate_media_parallel({}, "prompt", turn=1), timeout=5)
+
+    assert video_cancelled == [True]
+    assert result == {"video_urls": [None], "audio_url": None}
+
+
+@pytest.mark.asyncio
+async def test_ordinary_failure_does_not_cancel_siblings(service):
+
+    async def video(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return "https://example.com/v.mp4"
+
+    async def failing_audio(*args, **kwargs):
+        raise RuntimeError("transient")
+
+    service.generate_video = video
+    service.generate_audio = failing_audio
+
+    result = await service.generate_media_parallel({}, "prompt", turn=1)
+
+    assert result == {"video_urls": ["https://example.com/v.mp4"], "audio_url": None}
+
+
+@pytest.mark.asyncio
+async def test_duplicate_video_prompts_share_one_request(service):
+    prompts_seen = []
+
+    async def video(prompt, **kwargs):
+        prompts_seen.append(prompt)
+        return f"https://example.com/{prompt}.mp4"
+
+    async def audio(*args, **kwargs):
+        return "https://example.com/a.mp3"
+
+    service.generate_video = video
+    service.generate_audio = audio
+
+    result = await service.generate_media_parallel({}, ["a", "b", "a"], turn=1)
+
+    assert sorted(prompts_seen) == ["a", "b"]
+    assert result["video_urls"] == [
+        "https://example.com/a.mp4",
+        "https://example.com/b.mp4",
+        "https://example.com/a.mp4",
+    ]
@@ -1,6 +1,7 @@
 """
 Regression tests for issue #11: SSL certificate verification was unconditionally
-disabled in media_service.py's URL-fetch branch. These tests lock in that:
+disabled in media_service.py's URL-fetch branch. The fetch now goes through a
+shared httpx client; these tests lock in that:
   - Default path (VERIFY_SSL unset / "true") does NOT disable verification.
   - Explicit opt-out (VERIFY_SSL=false) does disable verification.
 """
@@ -82,24 +83,21 @@ class TestSSLVerificationDefault:
 
 
 class TestSSLConnectorBehavior:
-    """Assert that TCPConnector receives the correct ssl= argument."""
+    """Assert that the shared HTTP client receives the correct verify= argument."""
 
     def _patch_and_capture(self, verify_ssl_value: bool):
         """
-        Monkeypatch VERIFY_SSL on the already-loaded module and run
-        _fetch_video_from_url (or the inline code inside generate_video).
-        We capture what ssl= argument TCPConnector was called with.
+        Monkeypatch VERIFY_SSL on the already-loaded module and run the
+        URL-fetch branch of generate_video. We capture what verify= argument
+        httpx.AsyncClient was constructed with.
         """
         import asyncio
         import services.media_service as ms_mod
 
         captured = {}
 
-        original_connector = __import__("aiohttp").TCPConnector
-
-        class CapturingConnector:
-            def __init__(self, **kwargs):
-                captured["ssl"] = kwargs.get("ssl", "NOT_SET")
+        class FakeResponse:
+            status_code = 200
 
             async def __aenter__(self):
                 return self
@@ -107,39 +105,40 @@ class TestSSLConnectorBehavior:
             async def __aexit__(self, *a):
                 pass
 
-            async def close(self):
-                pass
+            async def aiter_bytes(self):
+                yield b"fake_video_bytes"
 
-        fake_response = AsyncMock()
-        fake_response.status = 200
-        fake_response.read = AsyncMock(return_value=b"fake_video_bytes")
-        fake_response.__aenter__ = AsyncMock(return_value=fake_response)
-        fake_response.__aexit__ = AsyncMock(return_value=False)
+        class CapturingClient:
+            is_closed = False
 
-        fake_session = MagicMock()
-        fake_session.get = MagicMock(return_value=fake_response)
-        fake_session.__aenter__ = AsyncMock(return_value=fake_session)
-        fake_session.__aexit__ = AsyncMock(return_value=False)
+            def __init__(self, **kwargs):
+                captured["verify"] = kwargs.get("verify", "NOT_SET")
+
+            def stream(self, method, url):
+                return FakeResponse()
+
+            async def aclose(self):
+                pass
 
         fake_huggingface = MagicMock()
-        fake_huggingface.generate_video = AsyncMock(
+        fake_huggingface.model = "Wan-AI/Wan2.2-TI2V-5B"
+        fake_huggingface.generate_video_bytes = AsyncMock(
             return_value="https://example.com/video.mp4"
         )
 
         fake_r2 = MagicMock()
-        fake_r2.upload_video = AsyncMock(return_value="https://r2.example.com/v.mp4")
+        fake_r2.file_exists = MagicMock(return_value=False)  # video cache miss
+        fake_r2.upload_stream = MagicMock(return_value="https://r2.example.com/v.mp4")
 
         with (
             patch.object(ms_mod, "VERIFY_SSL", verify_ssl_value),
-            patch("aiohttp.TCPConnector", CapturingConnector),
-            patch("aiohttp.ClientSession", return_value=fake_session),
+            patch("httpx.AsyncClient", CapturingClient),
         ):
-            svc = ms_mod.MediaService.__new__(ms_mod.MediaService)
+            svc = ms_mod.MediaService(huggingface_api_key="x", groq_api_key="y")
             svc.huggingface_service = fake_huggingface
             svc.r2_service = fake_r2
-            svc.logger = __import__("logging").getLogger("test")
 
-            asyncio.get_event_loop().run_until_complete(
+            asyncio.new_event_loop().run_until_complete(
                 svc.generate_video("test prompt", turn=1)
             )
 
@@ -147,31 +146,31 @@ class TestSSLConnectorBehavior:
 
     def test_default_verify_ssl_does_not_disable_verification(self):
         """
-        When VERIFY_SSL is True, the ssl= kwarg passed to TCPConnector must
-        NOT be an ssl.SSLContext with check_hostname=False / CERT_NONE.
-        Acceptable values: True, None, or a context with verification enabled.
+        When VERIFY_SSL is True, the verify= kwarg passed to httpx.AsyncClient
+        must NOT be an ssl.SSLContext with check_hostname=False / CERT_NONE.
+        Acceptable values: True, or a context with verification enabled.
         """
         captured = self._patch_and_capture(verify_ssl_value=True)
-        ssl_arg = captured.get("ssl", "NOT_SET")
+        verify_arg = captured.get("verify", "NOT_SET")
         # Must not be a broken SSLContext
-        if isinstance(ssl_arg, ssl.SSLContext):
-            assert ssl_arg.check_hostname is True, "check_hostname must remain True"
-            assert ssl_arg.verify_mode != ssl.CERT_NONE, "verify_mode must not be CERT_NONE"
+        if isinstance(verify_arg, ssl.SSLContext):
+            assert verify_arg.check_hostname is True, "check_hostname must remain True"
+            assert verify_arg.verify_mode != ssl.CERT_NONE, "verify_mode must not be CERT_NONE"
         else:
-            # True or None — both are aiohttp defaults (verification on)
-            assert ssl_arg in (True, None, "NOT_SET"), (
-                f"Unexpected ssl= value when VERIFY_SSL=True: {ssl_arg!r}"
+            # True or unset — both are httpx defaults (verification on)
+            assert verify_arg in (True, "NOT_SET"), (
+                f"Unexpected verify= value when VERIFY_SSL=True: {verify_arg!r}"
             )
 
     def test_opt_out_verify_ssl_disables_verification(self):
         """
-        When VERIFY_SSL is False, the ssl= kwarg must produce a context with
+        When VERIFY_SSL is False, the verify= kwarg must be a context with
         verification disabled (check_hostname=False, CERT_NONE).
         """
         captured = self._patch_and_capture(verify_ssl_value=False)
-        ssl_arg = captured.get("ssl", "NOT_SET")
-        assert isinstance(ssl_arg, ssl.SSLContext), (
-            f"Expected an SSLContext when VERIFY_SSL=False, got {type(ssl_arg)}"
+        verify_arg = captured.get("verify", "NOT_SET")
+        assert isinstance(verify_arg, ssl.SSLContext), (
+            f"Expected an SSLContext when VERIFY_SSL=False, got {type(verify_arg)}"
         )
-        assert ssl_arg.check_hostname is False
-        assert ssl_arg.verify_mode == ssl.CERT_NONE
+        assert verify_arg.check_hostname is False
+        assert verify_arg.verify_mode == ssl.CERT_NONE
@@ -77,4 +77,15 @@ class TestMediaUtils:
         # Verify extensions in filenames
         assert filename1.endswith(".mp4")
         assert filename2.endswith(".mp3")
-        assert filename3.endswith(".wav") 
\ No newline at end of file
+        assert filename3.endswith(".wav") 
+
+
+    def test_save_media_file_recreates_missing_directories(self, tmp_path, monkeypatch):
+        """Test that save_media_file recreates the media directories if they were removed."""
+        import utils.media as media
+        monkeypatch.setattr(media, "MEDIA_PUBLIC_ROOT", str(tmp_path / "media"))
+
+        url = media.save_media_file(b"mp3", "audio", "clip.mp3")
+
+        assert url == "/media/audio/clip.mp3"
+        assert (tmp_path / "media" / "audio" / "clip.mp3").read_bytes() == b"mp3"
@@ -0,0 +1,55 @@
+"""
+Tests for the AsyncTokenBucket rate limiter.
+"""
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import AsyncTokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Freeze the limiter's clock; record each sleep and advance the clock by it."""
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    recorded = []
+
+    async def fake_sleep(seconds):
+        recorded.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+@pytest.mark.asyncio
+async def test_burst_up_to_capacity_does_not_wait(sleeps):
+    bucket = AsyncTokenBucket(rate=0.5, capacity=3)
+
+    for _ in range(3):
+        await bucket.acquire()
+
+    assert sleeps == []
+
+
+@pytest.mark.asyncio
+async def test_waits_for_refill_when_empty(sleeps):
+    bucket = AsyncTokenBucket(rate=0.5, capacity=1)
+
+    await bucket.acquire()
+    await bucket.acquire()
+
+    assert sleeps == [pytest.approx(2.0)]
+
+
+def test_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(rate=0, capacity=1)
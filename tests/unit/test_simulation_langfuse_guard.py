@@ -19,7 +19,14 @@ class LangfuseLessLLM(LLMService):
 
 
 class FakeMediaService:
-    async def generate_media_parallel(self, scenario, video_prompt, turn=1):
+    @staticmethod
+    def new_filename_base(turn):
+        return f"turn_{turn}_test"
+
+    def prewarm_audio(self, scenario, turn=1, filename_base=None):
+        pass
+
+    async def generate_media_parallel(self, scenario, video_prompt, turn=1, filename_base=None):
         return {"video_urls": ["https://example.com/v.mp4"], "audio_url": None}
 
 
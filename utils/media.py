@@ -40,9 +40,6 @@ def save_media_file(content, file_type, filename):
     if file_type not in ['video', 'audio']:
         raise ValueError(f"Invalid file_type: {file_type}. Must be 'video' or 'audio'")
     
-    # Ensure public directories exist
-    ensure_media_directories()
-    
     # Determine public directory (absolute path) and URL subpath
     if file_type == 'video':
         public_dir = os.path.join(MEDIA_PUBLIC_ROOT, 'videos')
@@ -56,7 +53,14 @@ def save_media_file(content, file_type, filename):
     
     # Save only to the public location
     try:
-        with open(public_path, 'wb') as f:
+        try:
+            f = open(public_path, 'wb')
+        except FileNotFoundError:
+            # Directories are created at startup; only recreate them if they
+            # have since been removed, rather than re-checking on every save
+            ensure_media_directories()
+            f = open(public_path, 'wb')
+        with f:
             f.write(content)
         logger.info(f"Saved {file_type} to public directory: {public_path}")
         
@@ -0,0 +1,48 @@
+"""
+Async rate limiting helpers for calls to external APIs.
+"""
+
+import asyncio
+import time
+
+
+class AsyncTokenBucket:
+    """
+    Token-bucket rate limiter for coroutines.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. Each
+    acquire() takes one token, waiting only as long as needed for the next
+    one to arrive. Waiters are served in arrival order.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize the bucket full.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens that can accumulate (burst size)
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it."""
+        # Holding the lock while sleeping keeps later callers queued behind
+        # the one currently waiting for a token
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1